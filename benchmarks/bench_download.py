@@ -0,0 +1,220 @@
+import io
+import os
+import re
+import sys
+import json
+import time
+import zipfile
+import hashlib
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "downgrader"))
+
+class RangeHandler(SimpleHTTPRequestHandler):
+    # Serves single byte ranges and caps every connection at rate bytes per
+    # second, like a CDN that throttles each stream.
+    rate = 0
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        st = os.stat(path)
+        size = st.st_size
+        etag = f'"{st.st_mtime_ns:x}-{size:x}"'
+        start, end = 0, size - 1
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+        if match and self.headers.get("If-Range", etag) not in (etag, self.date_time_string(int(st.st_mtime))):
+            match = None
+        if match:
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(0, size - int(match.group(2)))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.date_time_string(int(st.st_mtime)))
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+
+        block = 64 * 1024
+        began = time.perf_counter()
+        sent = 0
+        with open(path, "rb") as f:
+            f.seek(start)
+            try:
+                while sent < end - start + 1:
+                    data = f.read(min(block, end - start + 1 - sent))
+                    self.wfile.write(data)
+                    sent += len(data)
+                    if self.rate:
+                        delay = sent / self.rate - (time.perf_counter() - began)
+                        if delay > 0:
+                            time.sleep(delay)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+def serve(directory, rate=0):
+    handler = type("Handler", (RangeHandler,), {"rate": rate})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(handler, directory=directory))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def build_archive(path, size_mb, members):
+    per_member = max(1, size_mb // members)
+    manifest = {"files": [{"path": f"models/file{i}", "action": "patch"} for i in range(members)]}
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as z:
+        z.writestr("Patches/manifest.json", json.dumps(manifest))
+        for i in range(members):
+            with z.open(f"Patches/models/file{i}.xdelta", "w") as f:
+                for _ in range(per_member):
+                    f.write(os.urandom(1048576))
+
+def md5sum(path):
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1048576), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def legacy_download(url, target_dir):
+    import requests
+    response = requests.get(url, stream=True, timeout=60)
+    buffer = io.BytesIO()
+    for chunk in response.iter_content(chunk_size=8192):
+        buffer.write(chunk)
+    with zipfile.ZipFile(buffer) as z:
+        z.extractall(target_dir)
+    return True
+
+def streaming_download(url, target_dir):
+    import icloud_resolver
+    return icloud_resolver.download_and_extract(url, target_dir)
+
+MEMORY_MODES = {"legacy (BytesIO)": legacy_download, "streaming": streaming_download}
+
+def run_child(mode, url, target_dir):
+    start = time.perf_counter()
+    ok = MEMORY_MODES[mode](url, target_dir)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux.
+    print(json.dumps({"ok": ok, "elapsed": elapsed, "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+
+def bench_memory(args, root, url):
+    for mode in MEMORY_MODES:
+        target = os.path.join(root, mode.split()[0])
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, url, target],
+                             capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{mode:<20} peak RSS {result['peak_rss'] / 1024:8.1f} MB  {result['elapsed']:6.2f} s"
+              f"  {'ok' if result['ok'] else 'FAILED'}")
+
+def bench_segments(args, root, url, expected_md5):
+    from core import download
+    size = args.size_mb * 1048576
+    for segments in sorted({1, *args.segments}):
+        target = os.path.join(root, f"segments_{segments}.zip")
+        start = time.perf_counter()
+        download.download_file(url, target, segments=segments)
+        elapsed = time.perf_counter() - start
+        ok = md5sum(target) == expected_md5
+        os.remove(target)
+        print(f"{segments:>2} segment(s)  {elapsed:6.2f} s  {size / elapsed / 1048576:7.1f} MB/s"
+              f"  {'ok' if ok else 'CORRUPT'}")
+
+def bench_selective(args, root, url):
+    from core import download, remote_zip
+    size = os.path.getsize(os.path.join(root, "serve", "Patches.zip"))
+
+    start = time.perf_counter()
+    download.download_file(url, os.path.join(root, "full.zip"))
+    elapsed = time.perf_counter() - start
+    print(f"{'whole archive':<24} {size / 1048576:8.1f} MB  {elapsed:6.2f} s")
+
+    for count in args.select:
+        target = os.path.join(root, f"selective_{count}")
+        start = time.perf_counter()
+        result = remote_zip.extract_selected(url, target, lambda manifest: [f["path"] for f in manifest["files"]][:count])
+        elapsed = time.perf_counter() - start
+        print(f"{f'{count} of {args.members} members':<24} {result['transferred'] / 1048576:8.1f} MB  {elapsed:6.2f} s")
+
+def bench_pooling(args, root, url):
+    import requests
+    from core import net
+    url = url.replace("Patches.zip", "manifest.json")
+    with open(os.path.join(root, "serve", "manifest.json"), "w") as f:
+        f.write("{}")
+
+    for name, get in (("new connection each", requests.get), ("pooled session", net.get)):
+        get(url, timeout=10)
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            get(url, timeout=10)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<24} {elapsed / args.requests * 1000:6.2f} ms/request")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Patches.zip download against a local HTTP server.")
+    parser.add_argument("mode", nargs="?", choices=("memory", "segments", "selective", "pooling"), default="memory",
+                        help="memory: peak RSS of buffered vs streamed download; segments: ranged download "
+                             "throughput; selective: fetching only some members through the central directory; "
+                             "pooling: small requests with and without the shared session")
+    parser.add_argument("--size-mb", type=int, default=128)
+    parser.add_argument("--members", type=int, default=8)
+    parser.add_argument("--rate-mb", type=float, default=16,
+                        help="per-connection bandwidth cap in MB/s, not applied in the memory mode (0 = unlimited)")
+    parser.add_argument("--segments", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--select", type=int, nargs="+", default=[1, 2],
+                        help="member counts fetched in the selective mode")
+    parser.add_argument("--requests", type=int, default=200, help="requests made in the pooling mode")
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "URL", "TARGET"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="bench_download_") as root:
+        serve_dir = os.path.join(root, "serve")
+        os.makedirs(serve_dir)
+        archive = os.path.join(serve_dir, "Patches.zip")
+        build_archive(archive, args.size_mb, args.members)
+
+        rate = args.rate_mb * 1048576 if args.mode != "memory" else 0
+        server, base_url = serve(serve_dir, rate)
+        url = f"{base_url}/Patches.zip"
+        print(f"Archive: {args.size_mb} MB in {args.members} members, served from {url}"
+              + (f" at {args.rate_mb:g} MB/s per connection" if rate else ""))
+
+        try:
+            if args.mode == "memory":
+                bench_memory(args, root, url)
+            elif args.mode == "pooling":
+                bench_pooling(args, root, url)
+            elif args.mode == "segments":
+                bench_segments(args, root, url, md5sum(archive))
+            else:
+                bench_selective(args, root, url)
+        finally:
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
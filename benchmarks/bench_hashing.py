@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import hashlib
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "downgrader"))
+from core import hashing
+
+def legacy_md5(file_path):
+    hash_md5 = hashlib.md5()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(4096), b""):
+            hash_md5.update(chunk)
+    return hash_md5.hexdigest()
+
+def measure(label, func, path, size, rounds):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<32} {size / 1048576 / best:8.1f} MB/s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy 4 KiB MD5 loop with hashing.hash_file.")
+    parser.add_argument("file", nargs="?", help="File to hash (default: a temporary file of random data)")
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    path = args.file
+    temp_path = None
+    if not path:
+        fd, temp_path = tempfile.mkstemp(prefix="bench_hashing_")
+        with os.fdopen(fd, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1048576))
+        path = temp_path
+
+    try:
+        size = os.path.getsize(path)
+        print(f"File: {path} ({size / 1048576:.0f} MB, best of {args.rounds}, page cache warm)")
+        legacy_md5(path)
+
+        measure("legacy md5 (4 KiB read loop)", legacy_md5, path, size, args.rounds)
+        measure("hash_file md5", hashing.calculate_md5, path, size, args.rounds)
+        measure("hash_file md5 + blake2b", lambda p: hashing.hash_file(p, ("md5", "blake2b")), path, size, args.rounds)
+        assert legacy_md5(path) == hashing.calculate_md5(path)
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+
+if __name__ == "__main__":
+    main()
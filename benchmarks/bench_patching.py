@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "downgrader"))
+from core import hashing, paths, scanner, vcdiff
+
+def run_inprocess(source, patch, output):
+    vcdiff.decode_file(source, patch, output)
+
+def run_subprocess(xdelta_bin):
+    def run(source, patch, output):
+        subprocess.run([xdelta_bin, "-d", "-f", "-s", source, patch, output], check=True, capture_output=True,
+                       creationflags=paths.get_creationflags())
+    return run
+
+def measure(label, func, jobs, out_dir):
+    start = time.perf_counter()
+    mismatched = 0
+    for rel_path, source, patch, target_hash in jobs:
+        output = os.path.join(out_dir, "out.bin")
+        func(source, patch, output)
+        if hashing.calculate_md5(output) != target_hash:
+            mismatched += 1
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed:8.2f} s  ({len(jobs)} patches, {mismatched} mismatched)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the in-process VCDIFF decoder with the xdelta3 binary.")
+    parser.add_argument("game", help="Unmodified game directory (the patch sources)")
+    parser.add_argument("--manifest", default=None, help="Path to Patches/manifest.json")
+    args = parser.parse_args()
+
+    manifest_path = args.manifest or paths.resolve_manifest_path()
+    patches_dir = os.path.dirname(manifest_path)
+    manifest = scanner.load_manifest(manifest_path)
+
+    jobs = []
+    for file_info in manifest.get("files", []):
+        if file_info.get("action", "patch") != "patch":
+            continue
+        source = paths.resolve_game_file(args.game, file_info["path"])
+        patch = os.path.join(patches_dir, f"{file_info['path']}.xdelta")
+        if os.path.exists(source) and os.path.exists(patch):
+            jobs.append((file_info["path"], source, patch, file_info["target_hash"]))
+
+    total = sum(os.path.getsize(job[2]) for job in jobs)
+    print(f"Patch set: {manifest_path} ({len(jobs)} patches, {total / 1048576:.1f} MB)")
+
+    with tempfile.TemporaryDirectory(prefix="bench_patching_") as out_dir:
+        measure("in-process vcdiff", run_inprocess, jobs, out_dir)
+        xdelta_bin = paths.find_xdelta_bin()
+        if xdelta_bin:
+            measure("xdelta3 subprocess", run_subprocess(xdelta_bin), jobs, out_dir)
+        else:
+            print("xdelta3 not found, skipping the subprocess run")
+
+if __name__ == "__main__":
+    main()
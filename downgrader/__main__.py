@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The app modules import each other as top-level modules (see main.py).
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main
+
+sys.exit(main())
@@ -0,0 +1,143 @@
+import os
+import sys
+import json
+import time
+import argparse
+from core import paths, scanner, hash_cache
+
+def emit(event, **data):
+    sys.stdout.write(json.dumps({"event": event, **data}) + "\n")
+    sys.stdout.flush()
+
+def error(message, code=2):
+    emit("error", message=message)
+    return code
+
+def get_game_path(args):
+    path = args.path or paths.find_game_path()
+    if not path or not os.path.isdir(path):
+        return None
+    return path
+
+def get_cache(args):
+    return None if args.no_cache else hash_cache.HashCache()
+
+def run_scan(args, game_path):
+    manifest = scanner.load_manifest(args.manifest)
+    engine = scanner.Scanner(get_cache(args))
+    progress = lambda cur, tot: emit("progress", stage="scan", current=cur, total=tot)
+    results, version, readonly = engine.scan(game_path, manifest, args.force, progress, watch=False)
+    files = [{key: r[key] for key in ("path", "status", "needs_patch", "current_hash", "target_hash")} for r in results]
+    return files, version, readonly
+
+def cmd_scan(args, game_path):
+    files, version, readonly = run_scan(args, game_path)
+    emit("scan", path=game_path, version=version, readonly=readonly, files=files)
+    return 0
+
+def cmd_verify(args, game_path):
+    files, version, readonly = run_scan(args, game_path)
+    pending = [f["path"] for f in files if f["needs_patch"] != "No"]
+    emit("verify", path=game_path, version=version, ok=not pending, pending=pending)
+    return 0 if not pending else 1
+
+def cmd_downgrade(args, game_path):
+    from core import patcher, planner
+
+    if scanner.is_readonly(game_path):
+        return error("Game directory is read-only.")
+
+    manifest = scanner.load_manifest(args.manifest)
+    files = manifest.get("files", [])
+    patches_dir = os.path.dirname(args.manifest)
+    cache = get_cache(args)
+
+    engine = scanner.Scanner(cache)
+    engine.scan(game_path, manifest, watch=False)
+    plan = planner.plan_downgrade(game_path, manifest, patches_dir, engine.results)
+    emit("plan", **plan)
+    if args.dry_run:
+        return 0
+    if not plan["fits"]:
+        return error(f"Not enough disk space: {plan['required_bytes']} bytes needed, {plan['free_bytes']} free.")
+
+    def progress(row, status, message):
+        emit("file", index=row, path=files[row]["path"], status=status, message=message)
+
+    start = time.perf_counter()
+    success, failed = patcher.patch_files(game_path, manifest, paths.find_xdelta_bin(), patches_dir, cache,
+                                          engine.results, progress, delta_backups=args.delta_backups)
+    planner.record_throughput(plan, time.perf_counter() - start)
+    emit("done", success=success, failed=failed)
+    return 0 if failed == 0 else 1
+
+def cmd_revert(args, game_path):
+    from core import reverter, backups
+
+    if not backups.has_backups(game_path):
+        return error("No backups found to revert.")
+
+    restored = reverter.revert_backups(game_path, get_cache(args),
+                                       lambda cur, tot, name: emit("progress", stage="revert", current=cur,
+                                                                   total=tot, file=name))
+    emit("done", restored=restored)
+    return 0
+
+def cmd_mods_install(args, game_path):
+    from core import mods
+
+    unknown = [m for m in args.mods if m not in mods.MOD_NAMES]
+    if unknown:
+        return error(f"Unknown mods: {', '.join(unknown)}. Available: {', '.join(mods.MOD_NAMES)}")
+
+    total = len(args.mods)
+    mods.install_mods(game_path, args.mods,
+                      lambda cur, name: emit("progress", stage="mods", current=cur, total=total, mod=name))
+    emit("done", installed=args.mods)
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="downgrader", description="GTA SA Open Downgrader (headless)")
+    parser.add_argument("--path", help="Game directory (default: auto-detect)")
+    parser.add_argument("--manifest", default=None, help="Path to Patches/manifest.json")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the hash cache")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name, func, help_text in [
+        ("scan", cmd_scan, "Hash the game files and report their status"),
+        ("verify", cmd_verify, "Exit with 0 only if every file is already downgraded"),
+    ]:
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("--force", action="store_true", help="Ignore cached hashes")
+        cmd.set_defaults(func=func)
+
+    downgrade = sub.add_parser("downgrade", help="Back up and patch the game files")
+    downgrade.add_argument("--dry-run", action="store_true", help="Only print the plan: actions, I/O and disk space")
+    downgrade.add_argument("--delta-backups", action="store_true",
+                           help="Store backups as reverse xdelta3 deltas when they are smaller than a full copy")
+    downgrade.set_defaults(func=cmd_downgrade)
+    sub.add_parser("revert", help="Restore the original files from backups").set_defaults(func=cmd_revert)
+
+    mods_parser = sub.add_parser("mods", help="Mod management")
+    mods_sub = mods_parser.add_subparsers(dest="mods_command", required=True)
+    install = mods_sub.add_parser("install", help="Download and install mods")
+    install.add_argument("mods", nargs="+", help="Mod names, e.g. \"ASI Loader\" ModLoader")
+    install.set_defaults(func=cmd_mods_install)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.manifest = args.manifest or paths.resolve_manifest_path()
+
+    game_path = get_game_path(args)
+    if not game_path:
+        return error("Game directory not found. Pass --path.")
+
+    if args.func is not cmd_revert and args.func is not cmd_mods_install and not os.path.exists(args.manifest):
+        return error(f"Manifest not found at {args.manifest}.")
+
+    try:
+        return args.func(args, game_path)
+    except Exception as e:
+        return error(str(e))
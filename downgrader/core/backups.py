@@ -0,0 +1,202 @@
+import os
+import json
+import threading
+from . import disk
+from . import hashing
+from . import xdelta
+from .paths import find_xdelta_bin, get_creationflags
+from .hash_cache import file_identity
+
+BACKUP_DIR = "backups"
+INDEX_NAME = "index.json"
+OBJECTS_DIR = "objects"
+INDEX_VERSION = 1
+
+class BackupStore:
+    # Originals are stored once under objects/<md5[:2]>/<md5> and index.json
+    # maps each game-relative path to the blob of its original.
+
+    def __init__(self, game_path, cache=None, import_legacy=True):
+        self.game_path = game_path
+        self.cache = cache
+        self.root = os.path.join(game_path, BACKUP_DIR)
+        self.index_path = os.path.join(self.root, INDEX_NAME)
+        self.objects_dir = os.path.join(self.root, OBJECTS_DIR)
+        self.files = {}
+        self.lock = threading.Lock()
+        self.blob_locks = {}
+        self.load(import_legacy)
+
+    def exists(self):
+        return bool(self.files)
+
+    def load(self, import_legacy=True):
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.files = data.get("files", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Failed to load backup index: {e}")
+        if import_legacy:
+            self.import_legacy()
+
+    def save(self):
+        with self.lock:
+            snapshot = {"version": INDEX_VERSION, "files": dict(self.files)}
+            os.makedirs(self.root, exist_ok=True)
+            temp_path = self.index_path + ".tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(snapshot, f, indent=1)
+            os.replace(temp_path, self.index_path)
+
+    def _key(self, rel_path):
+        return rel_path.replace(os.sep, "/")
+
+    def blob_path(self, md5):
+        return os.path.join(self.objects_dir, md5[:2], md5)
+
+    def delta_path(self, md5, base_md5):
+        return os.path.join(self.objects_dir, md5[:2], f"{md5}.{base_md5}.xdelta")
+
+    def entry_blob(self, entry):
+        if entry.get("base"):
+            return self.delta_path(entry["md5"], entry["base"])
+        return self.blob_path(entry["md5"])
+
+    def get(self, rel_path):
+        return self.files.get(self._key(rel_path))
+
+    def _store_blob(self, source_path, md5):
+        with self.lock:
+            blob_lock = self.blob_locks.setdefault(md5, threading.Lock())
+        with blob_lock:
+            blob = self.blob_path(md5)
+            if not os.path.exists(blob):
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                disk.copy_file(source_path, blob)
+            return blob
+
+    def backup(self, rel_path, source_path, md5=None, original_hash=None):
+        # A stored original is never replaced by a modified file; only a file
+        # matching the manifest's known original may replace an entry.
+        key = self._key(rel_path)
+        if md5 is None:
+            md5 = hashing.cached_md5(source_path, self.cache)
+        if md5 is None:
+            raise OSError(f"Cannot read {source_path}")
+
+        existing = self.files.get(key)
+        if existing:
+            if existing["md5"] == md5 or existing["md5"] == original_hash or md5 != original_hash:
+                return False
+
+        self._store_blob(source_path, md5)
+        with self.lock:
+            self.files[key] = {"md5": md5, "size": os.path.getsize(source_path)}
+        self.save()
+        return True
+
+    def compact(self, rel_path, downgraded_path, downgraded_md5, xdelta_bin):
+        # Replaces the full copy with a reverse delta from the downgraded file,
+        # unless the delta would not be smaller.
+        entry = self.get(rel_path)
+        if not entry or entry.get("base"):
+            return False
+        full = self.blob_path(entry["md5"])
+        delta = self.delta_path(entry["md5"], downgraded_md5)
+        if not os.path.exists(delta):
+            temp_delta = delta + ".tmp"
+            if not xdelta.encode(xdelta_bin, downgraded_path, full, temp_delta, get_creationflags()):
+                if os.path.exists(temp_delta):
+                    os.remove(temp_delta)
+                return False
+            os.replace(temp_delta, delta)
+        if os.path.getsize(delta) >= os.path.getsize(full):
+            os.remove(delta)
+            return False
+
+        with self.lock:
+            self.files[self._key(rel_path)] = {**entry, "base": downgraded_md5}
+        self.save()
+        return True
+
+    def restore(self, rel_path, target_path):
+        entry = self.get(rel_path)
+        if not entry:
+            raise KeyError(rel_path)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+        if not entry.get("base"):
+            disk.copy_file(self.blob_path(entry["md5"]), target_path)
+        else:
+            if hashing.cached_md5(target_path, self.cache) != entry["base"]:
+                raise OSError(f"{rel_path} was changed after the downgrade and its backup is a delta against the "
+                              f"downgraded file")
+            temp_output = target_path + ".tmp"
+            if xdelta.decode(find_xdelta_bin(), target_path, self.entry_blob(entry), temp_output,
+                             get_creationflags()) != entry["md5"]:
+                if os.path.exists(temp_output):
+                    os.remove(temp_output)
+                raise OSError(f"Failed to restore {rel_path} from its delta backup")
+            os.replace(temp_output, target_path)
+
+        if self.cache is not None:
+            self.cache.put(target_path, entry["md5"], file_identity(target_path))
+
+    def prune(self):
+        referenced = {os.path.basename(self.entry_blob(entry)) for entry in self.files.values()}
+        removed = 0
+        if not os.path.isdir(self.objects_dir):
+            return removed
+        for root, dirs, files in os.walk(self.objects_dir, topdown=False):
+            for name in files:
+                if name not in referenced:
+                    os.remove(os.path.join(root, name))
+                    removed += 1
+            if root != self.objects_dir and not os.listdir(root):
+                os.rmdir(root)
+        return removed
+
+    def legacy_files(self):
+        # Older releases mirrored the game tree directly under backups/.
+        legacy = []
+        if not os.path.isdir(self.root):
+            return legacy
+        for root, dirs, files in os.walk(self.root):
+            if root == self.root:
+                dirs[:] = [d for d in dirs if d != OBJECTS_DIR]
+                files = [f for f in files if f != INDEX_NAME and not f.endswith(".tmp")]
+            legacy.extend(os.path.join(root, f) for f in files)
+        return legacy
+
+    def import_legacy(self):
+        legacy = self.legacy_files()
+        if not legacy:
+            return
+
+        for legacy_file in legacy:
+            key = self._key(os.path.relpath(legacy_file, self.root))
+            md5 = hashing.calculate_md5(legacy_file)
+            if md5 is None:
+                continue
+            if key not in self.files:
+                blob = self.blob_path(md5)
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                self.files[key] = {"md5": md5, "size": os.path.getsize(legacy_file)}
+                if not os.path.exists(blob):
+                    os.replace(legacy_file, blob)
+                    continue
+            os.remove(legacy_file)
+        self.save()
+
+        for root, dirs, files in os.walk(self.root, topdown=False):
+            if root != self.root and not root.startswith(self.objects_dir) and not os.listdir(root):
+                os.rmdir(root)
+
+def has_backups(game_path):
+    # Only looks. Legacy backups are migrated by the revert or backup that uses them.
+    store = BackupStore(game_path, import_legacy=False)
+    return store.exists() or bool(store.legacy_files())
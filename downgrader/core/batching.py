@@ -0,0 +1,26 @@
+import time
+import threading
+
+class UpdateBatcher:
+    def __init__(self, emit, interval=0.1):
+        self.emit = emit
+        self.interval = interval
+        self.pending = []
+        self.last_flush = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, item):
+        with self.lock:
+            self.pending.append(item)
+            if time.monotonic() - self.last_flush >= self.interval:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if self.pending:
+            batch, self.pending = self.pending, []
+            self.emit(batch)
+        self.last_flush = time.monotonic()
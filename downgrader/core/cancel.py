@@ -0,0 +1,24 @@
+import threading
+
+# Like asyncio.CancelledError, so the broad "except Exception" handlers
+# around file operations don't swallow it.
+class Cancelled(BaseException):
+    pass
+
+class CancelToken:
+    def __init__(self):
+        self.event = threading.Event()
+
+    def cancel(self):
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+    def wait(self, timeout):
+        return self.event.wait(timeout)
+
+    def check(self):
+        if self.event.is_set():
+            raise Cancelled()
@@ -0,0 +1,79 @@
+import os
+import shutil
+import platform
+
+def is_rotational(path):
+    if platform.system() != "Linux":
+        return False
+    try:
+        st_dev = os.stat(path).st_dev
+        device_dir = os.path.realpath(f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}")
+        # Partitions don't have a queue directory of their own, their parent disk does.
+        for candidate in (device_dir, os.path.dirname(device_dir)):
+            rotational = os.path.join(candidate, "queue", "rotational")
+            if os.path.exists(rotational):
+                with open(rotational, 'r') as f:
+                    return f.read().strip() == "1"
+    except (OSError, ValueError):
+        pass
+    return False
+
+FICLONE = 0x40049409
+
+def _reflink(fsrc, fdst):
+    if platform.system() != "Linux":
+        return False
+    import fcntl
+    try:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return True
+    except OSError:
+        return False
+
+def _copy_range(fsrc, fdst):
+    size = os.fstat(fsrc.fileno()).st_size
+    offset = 0
+    copy_range = getattr(os, "copy_file_range", None)
+    try:
+        while offset < size:
+            if copy_range:
+                n = copy_range(fsrc.fileno(), fdst.fileno(), size - offset)
+            else:
+                n = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size - offset)
+            if n == 0:
+                break
+            offset += n
+    except OSError:
+        # Old kernels refuse cross-filesystem ranges; finish with plain reads.
+        pass
+    fsrc.seek(offset)
+    fdst.seek(offset)
+    shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+
+def copy_file(src, dst):
+    # Written next to dst and renamed over it, so a hardlinked dst is
+    # replaced rather than written through.
+    temp_dst = dst + ".copy"
+    try:
+        if platform.system() != "Linux":
+            shutil.copy2(src, temp_dst)
+        else:
+            with open(src, 'rb') as fsrc, open(temp_dst, 'wb') as fdst:
+                if not _reflink(fsrc, fdst):
+                    _copy_range(fsrc, fdst)
+            shutil.copystat(src, temp_dst)
+        os.replace(temp_dst, dst)
+    except BaseException:
+        if os.path.exists(temp_dst):
+            os.remove(temp_dst)
+        raise
+
+def link_file(src, dst):
+    temp_dst = dst + ".link"
+    try:
+        if os.path.lexists(temp_dst):
+            os.remove(temp_dst)
+        os.link(src, temp_dst)
+        os.replace(temp_dst, dst)
+    except OSError:
+        copy_file(src, dst)
@@ -0,0 +1,299 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from . import net
+from .cancel import Cancelled
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_SEGMENTS = 4
+# Smaller segments spend more on request round trips than they gain.
+MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+CHECKPOINT_INTERVAL = 1.0
+
+def get_segment_count():
+    try:
+        segments = int(os.environ.get("DOWNGRADER_DOWNLOAD_SEGMENTS", DEFAULT_SEGMENTS))
+    except ValueError:
+        segments = DEFAULT_SEGMENTS
+    return max(1, segments)
+
+def parse_content_range(value):
+    # "bytes 0-1023/4096" -> (0, 1023, 4096), the total is None when it is "*".
+    try:
+        unit, spec = value.split(" ", 1)
+        span, total = spec.split("/", 1)
+        start, end = span.split("-", 1)
+        if unit.strip().lower() != "bytes":
+            return None
+        return int(start), int(end), None if total.strip() == "*" else int(total)
+    except (AttributeError, ValueError):
+        return None
+
+def split_ranges(total, segments, min_size=MIN_SEGMENT_SIZE):
+    count = max(1, min(segments, total // max(1, min_size)))
+    size = -(-total // count)
+    return [(start, min(start + size, total) - 1) for start in range(0, total, size)]
+
+def plan_ranges(gaps, segments, min_size=MIN_SEGMENT_SIZE):
+    # Cuts the missing byte ranges into pieces of about remaining / segments.
+    remaining = sum(end - start + 1 for start, end in gaps)
+    size = max(min_size, -(-remaining // max(1, segments)))
+    ranges = []
+    for start, end in gaps:
+        count = max(1, -(-(end - start + 1) // size))
+        ranges += [(start + s, start + e) for s, e in split_ranges(end - start + 1, count, 1)]
+    return ranges
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if end < start:
+            continue
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def get_validators(headers):
+    etag = headers.get("etag")
+    # Weak tags are not allowed in If-Range.
+    if etag and etag.startswith("W/"):
+        etag = None
+    return {"etag": etag, "last_modified": headers.get("last-modified")}
+
+def preallocate(path, size):
+    with open(path, 'wb') as f:
+        if size <= 0:
+            return
+        try:
+            # Reserves the blocks up front, so a full disk fails here and not
+            # halfway through the download.
+            os.posix_fallocate(f.fileno(), 0, size)
+        except (AttributeError, OSError):
+            f.truncate(size)
+
+class PartialDownload:
+    # The part file is written at its final offsets and the checkpoint beside
+    # it lists the byte ranges already on disk, so a later call can pick up
+    # from there with range requests.
+
+    def __init__(self, path, source, callback=None):
+        self.path = path
+        self.part_path = path + ".part"
+        self.checkpoint_path = path + ".part.json"
+        self.source = source
+        self.callback = callback
+        self.size = 0
+        self.validators = {}
+        self.done = []
+        self.positions = {}
+        self.downloaded = 0
+        self.saved_at = 0
+        self.lock = threading.Lock()
+
+    @property
+    def resumable(self):
+        return bool(self.size and self.if_range)
+
+    @property
+    def if_range(self):
+        return self.validators.get("etag") or self.validators.get("last_modified")
+
+    def load(self):
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                data = json.load(f)
+            if data["source"] != self.source or os.path.getsize(self.part_path) != data["size"]:
+                return False
+            self.size = data["size"]
+            self.validators = {"etag": data.get("etag"), "last_modified": data.get("last_modified")}
+            self.done = merge_ranges(data["done"])
+        except Exception:
+            return False
+        return self.resumable
+
+    def matches(self, headers):
+        # Extra guard for servers that ignore If-Range and answer 206 anyway.
+        current = get_validators(headers)
+        return all(current[k] is None or self.validators.get(k) in (None, current[k]) for k in current)
+
+    def missing(self):
+        gaps = []
+        position = 0
+        for start, end in self.done:
+            if start > position:
+                gaps.append((position, start - 1))
+            position = end + 1
+        if position < self.size:
+            gaps.append((position, self.size - 1))
+        return gaps
+
+    def begin(self, size, validators):
+        self.remove()
+        self.size = size
+        self.validators = validators
+        self.done = []
+        preallocate(self.part_path, size)
+        if self.resumable:
+            self.save()
+
+    def report(self):
+        self.downloaded = sum(end - start + 1 for start, end in self.done)
+        if self.callback:
+            self.callback(self.downloaded, self.size)
+
+    def advance(self, start, position):
+        # Bytes start..position - 1 of a segment are written out.
+        with self.lock:
+            self.downloaded += position - self.positions.get(start, start)
+            self.positions[start] = position
+            if self.callback:
+                self.callback(self.downloaded, self.size)
+            if self.resumable and time.monotonic() - self.saved_at >= CHECKPOINT_INTERVAL:
+                self.save()
+
+    def save(self):
+        done = merge_ranges(self.done + [[start, pos - 1] for start, pos in self.positions.items()])
+        # The ranges may only be recorded once the bytes are on disk.
+        with open(self.part_path, 'rb+') as f:
+            os.fsync(f.fileno())
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({"source": self.source, "size": self.size, **self.validators, "done": done}, f)
+        os.replace(temp_path, self.checkpoint_path)
+        self.saved_at = time.monotonic()
+
+    def suspend(self):
+        with self.lock:
+            if self.resumable:
+                self.save()
+            else:
+                self.remove()
+
+    def finish(self):
+        os.replace(self.part_path, self.path)
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def remove(self):
+        for path in (self.part_path, self.checkpoint_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+def write_range(response, part, start, end, check):
+    # Copies the response body to bytes start..end of the part file. A
+    # response that runs past end (the open-ended first request) is cut off.
+    position = start
+    with response, open(part.part_path, 'r+b', buffering=0) as f:
+        f.seek(start)
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            check()
+            if not chunk:
+                continue
+            if end is not None:
+                chunk = chunk[:end + 1 - position]
+            view = memoryview(chunk)
+            while view:
+                view = view[f.write(view):]
+            position += len(chunk)
+            part.advance(start, position)
+            if end is not None and position > end:
+                break
+    if end is not None and position <= end:
+        raise IOError(f"Connection closed with {end + 1 - position} bytes left in range {start}-{end}")
+
+def fetch_range(url, part, start, end, check):
+    headers = {"Range": f"bytes={start}-{end}"}
+    if part.if_range:
+        headers["If-Range"] = part.if_range
+    response = net.get(url, headers=headers, stream=True, timeout=60)
+    response.raise_for_status()
+    content_range = parse_content_range(response.headers.get("content-range"))
+    if response.status_code != 206 or not content_range or content_range[0] != start:
+        response.close()
+        raise IOError(f"Server ignored the range request for bytes {start}-{end}")
+    write_range(response, part, start, end, check)
+
+def resume_request(url, part):
+    # Asks for the rest of the first gap, a 200 answer to If-Range means the
+    # file changed on the server and the part file is worthless.
+    start = part.missing()[0][0]
+    response = net.get(url, headers={"Range": f"bytes={start}-", "If-Range": part.if_range}, stream=True, timeout=60)
+    response.raise_for_status()
+    content_range = parse_content_range(response.headers.get("content-range"))
+    if (response.status_code == 206 and content_range and content_range[0] == start
+            and content_range[2] == part.size and part.matches(response.headers)):
+        return response
+    response.close()
+    return None
+
+def download_file(url, path, progress_callback=None, cancel=None, segments=None, source=None):
+    # Downloads into path + ".part" and renames it to path when complete. The
+    # first request asks for "bytes=0-": a 206 answer proves the server honours
+    # ranges and already streams the first segment, a 200 answer is read as a
+    # plain single connection download that cannot be resumed.
+    part = PartialDownload(path, source or url, progress_callback)
+    response = None
+    if part.load():
+        if not part.missing():
+            part.finish()
+            return part.size
+        response = resume_request(url, part)
+
+    if response is None:
+        response = net.get(url, headers={"Range": "bytes=0-"}, stream=True, timeout=60)
+        response.raise_for_status()
+        content_range = parse_content_range(response.headers.get("content-range"))
+        try:
+            if response.status_code == 206 and content_range and content_range[2] is not None:
+                part.begin(content_range[2], get_validators(response.headers))
+            else:
+                part.begin(int(response.headers.get("content-length", 0)), {})
+        except Exception:
+            response.close()
+            raise
+        ranged = response.status_code == 206 and part.size > 0
+    else:
+        ranged = True
+
+    if segments is None:
+        segments = get_segment_count()
+    ranges = plan_ranges(part.missing(), segments) if ranged else [(0, None)]
+    part.report()
+    failed = threading.Event()
+
+    def check():
+        if cancel is not None:
+            cancel.check()
+        if failed.is_set():
+            raise Cancelled()
+
+    def run(index):
+        start, end = ranges[index]
+        try:
+            if index == 0:
+                write_range(response, part, start, end, check)
+            else:
+                check()
+                fetch_range(url, part, start, end, check)
+        except BaseException:
+            failed.set()
+            raise
+
+    with ThreadPoolExecutor(max_workers=max(1, min(segments, len(ranges)))) as pool:
+        futures = [pool.submit(run, i) for i in range(len(ranges))]
+
+    errors = [f.exception() for f in futures if f.exception() is not None]
+    if errors:
+        part.suspend()
+        # Report the segment that failed first, not the ones it stopped.
+        for error in errors:
+            if not isinstance(error, Cancelled):
+                raise error
+        raise errors[0]
+
+    part.finish()
+    return part.size
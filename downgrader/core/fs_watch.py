@@ -0,0 +1,139 @@
+import os
+import sys
+import struct
+import threading
+from .hash_cache import file_identity
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+RESET_MASK = IN_DELETE_SELF | IN_MOVE_SELF | IN_Q_OVERFLOW | IN_IGNORED
+EVENT_HEADER = struct.Struct("iIII")
+
+_libc = None
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        _libc = libc
+    return _libc
+
+def normalize_path(path):
+    return os.path.normcase(os.path.abspath(path))
+
+class PollingWatcher:
+    def __init__(self, paths, fallback_reason=None):
+        self.paths = {normalize_path(p) for p in paths}
+        # Why inotify could not be used, None when polling was the only option.
+        self.fallback_reason = fallback_reason
+        self.snapshot = {}
+        self.stale = False
+        self.lock = threading.Lock()
+        self.take_dirty()
+
+    def take_dirty(self):
+        with self.lock:
+            current = {p: file_identity(p) for p in self.paths}
+            dirty = {p for p in self.paths if current[p] != self.snapshot.get(p, False)}
+            self.snapshot = current
+            return dirty
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    def __init__(self, paths):
+        import ctypes
+        self.paths = {normalize_path(p) for p in paths}
+        self.lock = threading.Lock()
+        self.dirty = set()
+        self.watches = {}
+        self.stale = False
+
+        libc = _load_libc()
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.unwatched = set()
+        for directory in {os.path.dirname(p) for p in self.paths}:
+            if not os.path.isdir(directory):
+                self.unwatched.update(p for p in self.paths if os.path.dirname(p) == directory)
+                continue
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                self.close()
+                raise OSError(err, f"inotify_add_watch failed for {directory}")
+            self.watches[wd] = directory
+
+    def _drain(self):
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return
+            if not data:
+                return
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b"\0")
+                offset += name_len
+
+                if mask & RESET_MASK:
+                    # The queue overflowed or a watched directory went away,
+                    # so this watcher can no longer be trusted.
+                    self.stale = True
+                    continue
+
+                directory = self.watches.get(wd)
+                if directory and name:
+                    path = normalize_path(os.path.join(directory, os.fsdecode(name)))
+                    if path in self.paths:
+                        self.dirty.add(path)
+
+    def take_dirty(self):
+        with self.lock:
+            self._drain()
+            if self.stale:
+                return set(self.paths)
+            dirty = self.dirty | self.unwatched
+            self.dirty = set()
+            return dirty
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+def create_watcher(paths):
+    import platform
+    if platform.system() == "Linux":
+        try:
+            return InotifyWatcher(paths)
+        except Exception as e:
+            # stdout carries the CLI's JSON events.
+            sys.stderr.write(f"inotify unavailable, falling back to polling: {e}\n")
+            return PollingWatcher(paths, str(e))
+    return PollingWatcher(paths)
@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import platform
+import threading
+
+CACHE_VERSION = 1
+MAX_ENTRIES = 20000
+
+def get_cache_dir():
+    if platform.system() == "Windows":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "gtasa-open-downgrader")
+
+def file_identity(path, st=None):
+    try:
+        if st is None:
+            st = os.stat(path)
+        return [st.st_size, st.st_mtime_ns, st.st_ino]
+    except OSError:
+        return None
+
+class HashCache:
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or os.path.join(get_cache_dir(), "hashes.json")
+        self.entries = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.load()
+
+    def _key(self, path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def load(self):
+        try:
+            with open(self.cache_path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data.get("entries", {})
+        except Exception:
+            self.entries = {}
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            self._evict()
+            snapshot = {"version": CACHE_VERSION, "entries": dict(self.entries)}
+            self.dirty = False
+
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temp_path = self.cache_path + ".tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(temp_path, self.cache_path)
+        except Exception as e:
+            print(f"Failed to save hash cache: {e}")
+
+    def get(self, path, identity=None):
+        if identity is None:
+            identity = file_identity(path)
+        if identity is None:
+            return None
+
+        key = self._key(path)
+        with self.lock:
+            entry = self.entries.get(key)
+            if not entry:
+                return None
+            if entry["identity"] != identity:
+                del self.entries[key]
+                self.dirty = True
+                return None
+            entry["used"] = int(time.time())
+            return entry["md5"]
+
+    def put(self, path, md5, identity):
+        if not md5 or identity is None:
+            return
+        with self.lock:
+            self.entries[self._key(path)] = {"identity": identity, "md5": md5, "used": int(time.time())}
+            self.dirty = True
+
+    def invalidate(self, path):
+        with self.lock:
+            if self.entries.pop(self._key(path), None) is not None:
+                self.dirty = True
+
+    def clear(self, prefix=None):
+        with self.lock:
+            if prefix is None:
+                self.entries = {}
+            else:
+                prefix = self._key(prefix) + os.sep
+                self.entries = {k: v for k, v in self.entries.items() if not k.startswith(prefix)}
+            self.dirty = True
+
+    def _evict(self):
+        stale = [k for k, v in self.entries.items() if file_identity(k) != v["identity"]]
+        for key in stale:
+            del self.entries[key]
+
+        if len(self.entries) > MAX_ENTRIES:
+            by_age = sorted(self.entries, key=lambda k: self.entries[k].get("used", 0))
+            for key in by_age[:len(self.entries) - MAX_ENTRIES]:
+                del self.entries[key]
@@ -0,0 +1,114 @@
+import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .hash_cache import file_identity
+
+CHUNK_SIZE = 1024 * 1024
+
+# Set DOWNGRADER_HASH_WORKERS=1 on spinning disks to hash sequentially.
+DEFAULT_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+def get_worker_count():
+    try:
+        workers = int(os.environ.get("DOWNGRADER_HASH_WORKERS", DEFAULT_WORKERS))
+    except ValueError:
+        workers = DEFAULT_WORKERS
+    return max(1, workers)
+
+def hash_file(file_path, algorithms=("md5",), chunk_size=CHUNK_SIZE, cancel=None):
+    hashers = [hashlib.new(name) for name in algorithms]
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+
+    with open(file_path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            try:
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass
+
+        while True:
+            if cancel is not None:
+                cancel.check()
+            read = f.readinto(buffer)
+            if not read:
+                break
+            chunk = view[:read]
+            for hasher in hashers:
+                hasher.update(chunk)
+
+    return {name: hasher.hexdigest() for name, hasher in zip(algorithms, hashers)}
+
+def calculate_md5(file_path, cancel=None):
+    try:
+        return hash_file(file_path, cancel=cancel)["md5"]
+    except Exception:
+        return None
+
+def hash_with_identity(path, cancel=None):
+    identity = file_identity(path)
+    md5 = calculate_md5(path, cancel)
+    # A file that changed while it was being read must not be cached.
+    if identity is None or file_identity(path) != identity:
+        return md5, None
+    return md5, identity
+
+def cached_md5(path, cache=None, force=False):
+    if cache is None:
+        return calculate_md5(path)
+    if not force:
+        md5 = cache.get(path)
+        if md5:
+            return md5
+    md5, identity = hash_with_identity(path)
+    cache.put(path, md5, identity)
+    return md5
+
+def hash_files(paths, workers=None, progress_callback=None, cache=None, force=False, cancel=None):
+    if workers is None:
+        workers = get_worker_count()
+
+    unique = list(dict.fromkeys(paths))
+    hashes = {}
+    pending = []
+
+    for path in unique:
+        identity = file_identity(path)
+        md5 = cache.get(path, identity) if cache is not None and not force else None
+        if md5:
+            hashes[path] = (md5, identity)
+        else:
+            pending.append((identity[0] if identity else -1, path))
+
+    total = len(unique)
+    done = len(hashes)
+    if progress_callback and done:
+        progress_callback(done, total)
+
+    # Biggest files first so the large archives don't end up as a serial tail.
+    pending.sort(reverse=True)
+    ordered = [path for _, path in pending]
+
+    def store(path, result):
+        md5, identity = result
+        hashes[path] = result
+        if cache is not None:
+            cache.put(path, md5, identity)
+
+    if workers <= 1 or len(ordered) <= 1:
+        for path in ordered:
+            store(path, hash_with_identity(path, cancel))
+            done += 1
+            if progress_callback:
+                progress_callback(done, total)
+        return hashes
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(ordered))) as pool:
+        futures = {pool.submit(hash_with_identity, path, cancel): path for path in ordered}
+        for future in as_completed(futures):
+            store(futures[future], future.result())
+            done += 1
+            if progress_callback:
+                progress_callback(done, total)
+
+    return hashes
@@ -0,0 +1,115 @@
+import os
+import json
+import threading
+from .hash_cache import file_identity
+
+JOURNAL_NAME = ".downgrader_journal"
+
+BACKED_UP = "backed_up"
+DECODED = "decoded"
+VERIFIED = "verified"
+COMMITTED = "committed"
+
+class PatchJournal:
+    # Append-only log of each file's progress through a downgrade. A run that
+    # finishes removes it, so one that is found on disk was interrupted.
+
+    def __init__(self, game_path, manifest):
+        self.path = os.path.join(game_path, JOURNAL_NAME)
+        self.manifest_id = manifest.get("generated")
+        self.states = {}
+        self.valid_size = 0
+        self.lock = threading.Lock()
+        self.load()
+        self.file = open(self.path, 'a')
+        if not self.states:
+            self.file.truncate(0)
+            self._write({"manifest": self.manifest_id})
+        else:
+            # Cut off a torn tail, new records appended after it would be
+            # unreadable on the next resume.
+            self.file.truncate(self.valid_size)
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+
+        states = {}
+        valid_size = 0
+        for i, line in enumerate(lines):
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("Unterminated record")
+                entry = json.loads(line)
+            except ValueError:
+                # A torn write from the crash, everything before it is intact.
+                break
+            valid_size += len(line)
+            if i == 0:
+                if entry.get("manifest") != self.manifest_id:
+                    return
+                continue
+            states[entry["path"]] = entry
+        self.states = states
+        self.valid_size = valid_size
+
+    def was_interrupted(self):
+        return bool(self.states)
+
+    def _write(self, entry):
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def record(self, rel_path, state, **data):
+        entry = {"path": rel_path, "state": state, **data}
+        with self.lock:
+            self._write(entry)
+            self.states[rel_path] = entry
+
+    def state(self, rel_path):
+        entry = self.states.get(rel_path)
+        return entry["state"] if entry else None
+
+    def known_hash(self, rel_path, target_file):
+        entry = self.states.get(rel_path)
+        if entry and entry.get("identity") is not None and entry["identity"] == file_identity(target_file):
+            return entry["hash"]
+        return None
+
+    def temp_state(self, rel_path, target_file):
+        # The decoded output only counts if neither it nor its source changed.
+        entry = self.states.get(rel_path)
+        if not entry or entry["state"] not in (DECODED, VERIFIED):
+            return None
+        if self.known_hash(rel_path, target_file) is None:
+            return None
+        if entry.get("temp_identity") is None or entry["temp_identity"] != file_identity(target_file + ".tmp"):
+            return None
+        return entry["state"]
+
+    def has_backup(self, rel_path, target_file):
+        if self.state(rel_path) not in (BACKED_UP, DECODED, VERIFIED):
+            return False
+        return self.known_hash(rel_path, target_file) is not None
+
+    def close(self, complete=True):
+        self.file.close()
+        if complete:
+            os.remove(self.path)
+
+def remove_orphans(target_files, journal=None):
+    # Leftovers from decodes and copies that an interrupted run never renamed.
+    removed = 0
+    for rel_path, target_file in target_files:
+        for suffix in (".tmp", ".copy", ".link"):
+            orphan = target_file + suffix
+            if suffix == ".tmp" and journal is not None and journal.temp_state(rel_path, target_file):
+                continue
+            if os.path.exists(orphan):
+                os.remove(orphan)
+                removed += 1
+    return removed
@@ -0,0 +1,185 @@
+import os
+import io
+import json
+import zipfile
+from . import net
+
+MOD_NAMES = [
+    "ASI Loader",
+    "ModLoader",
+    "SilentPatch",
+    "Widescreen Fixes",
+    "SkyGFX",
+    "Frontend Mods",
+    "Framerate Vigilante (60fps fix)",
+    "GInput",
+    "Project 2DFX",
+]
+PRIORITY_MODS = ["ASI Loader", "ModLoader"]
+
+def get_config_path(game_path):
+    return os.path.join(game_path, "modloader", ".downgrader")
+
+def get_installed_mods(game_path):
+    config_path = get_config_path(game_path)
+    if os.path.exists(config_path):
+        try:
+            with open(config_path, 'r') as f:
+                data = json.load(f)
+                return data.get("installed_mods", [])
+        except Exception:
+            pass
+    return []
+
+def install_mods(game_path, selected_mods, progress_callback=None, cancel=None):
+    to_install = [m for m in PRIORITY_MODS if m in selected_mods]
+    to_install += [m for m in selected_mods if m not in PRIORITY_MODS]
+
+    modloader_path = os.path.join(game_path, "modloader")
+    config_path = get_config_path(game_path)
+    installed_already = set(get_installed_mods(game_path))
+
+    for i, mod_name in enumerate(to_install):
+        if cancel is not None:
+            cancel.check()
+        if progress_callback:
+            progress_callback(i + 1, mod_name)
+        if mod_name in installed_already:
+            continue
+
+        apply_mod(game_path, mod_name)
+
+    if os.path.exists(modloader_path):
+        try:
+            installed = set(get_installed_mods(game_path))
+            installed.update(to_install)
+            with open(config_path, 'w') as f:
+                json.dump({"installed_mods": list(installed), "version": "0.1.1"}, f)
+        except Exception:
+            pass
+
+def apply_mod(game_path, mod_name):
+    if mod_name == "ASI Loader":
+        url = "https://silent.rockstarvision.com/uploads/silents_asi_loader_13.zip"
+        response = net.get(url, timeout=30)
+        response.raise_for_status()
+        with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+            to_extract = ["vorbisFile.dll", "vorbisHooked.dll"]
+            for file_name in to_extract:
+                if file_name in z.namelist():
+                    with open(os.path.join(game_path, file_name), "wb") as f:
+                        f.write(z.read(file_name))
+            for member in z.namelist():
+                if member.startswith("scripts/"):
+                    z.extract(member, game_path)
+
+    elif mod_name == "ModLoader":
+        url = "https://fs.xserv.pp.ua/files/modloader.zip"
+        response = net.get(url, timeout=30)
+        response.raise_for_status()
+        with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+            z.extractall(game_path)
+
+    elif mod_name == "SilentPatch":
+        api_url = "https://api.github.com/repos/CookiePLMonster/SilentPatch/releases/latest"
+        response = net.get(api_url, timeout=15)
+        response.raise_for_status()
+        assets = response.json().get("assets", [])
+        download_url = next((a["browser_download_url"] for a in assets if a["name"] == "SilentPatchSA.zip"), None)
+
+        if download_url:
+            response = net.get(download_url, timeout=30)
+            response.raise_for_status()
+            target_dir = os.path.join(game_path, "modloader", "SilentPatch")
+            os.makedirs(target_dir, exist_ok=True)
+            with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+                for member in z.namelist():
+                    if member.lower().endswith((".asi", ".ini")):
+                        filename = os.path.basename(member)
+                        if filename:
+                            with open(os.path.join(target_dir, filename), "wb") as f:
+                                f.write(z.read(member))
+        else:
+            raise Exception("Could not find SilentPatchSA.zip in latest GitHub release.")
+
+    elif mod_name == "Widescreen Fixes":
+        fixes = [
+            ("https://github.com/ThirteenAG/WidescreenFixesPack/releases/download/gtasa/GTASA.WidescreenFix.zip", "WidescreenFix"),
+            ("https://github.com/ThirteenAG/WidescreenFixesPack/releases/download/gtasa/GTASA.WidescreenFrontend.zip", "WidescreenFrontend")
+        ]
+        for url, folder_name in fixes:
+            response = net.get(url, timeout=60)
+            response.raise_for_status()
+            target_dir = os.path.join(game_path, "modloader", folder_name)
+            os.makedirs(target_dir, exist_ok=True)
+            with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+                z.extractall(target_dir)
+
+    elif mod_name == "SkyGFX":
+        api_url = "https://api.github.com/repos/aap/skygfx/releases/latest"
+        response = net.get(api_url, timeout=15)
+        response.raise_for_status()
+        assets = response.json().get("assets", [])
+        download_url = next((a["browser_download_url"] for a in assets if "sa" in a["name"].lower() and a["name"].endswith(".zip")), None)
+
+        if not download_url and assets:
+            download_url = next((a["browser_download_url"] for a in assets if a["name"].endswith(".zip")), None)
+
+        if download_url:
+            response = net.get(download_url, timeout=60)
+            response.raise_for_status()
+            target_dir = os.path.join(game_path, "modloader", "SkyGFX")
+            os.makedirs(target_dir, exist_ok=True)
+            with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+                z.extractall(target_dir)
+        else:
+            raise Exception("Could not find SkyGFX zip in latest GitHub release.")
+
+    elif mod_name == "Frontend Mods":
+        url = "https://fs.xserv.pp.ua/files/Frontend%20Mods.zip"
+        response = net.get(url, timeout=60)
+        response.raise_for_status()
+        target_dir = os.path.join(game_path, "modloader", "FrontendMods")
+        os.makedirs(target_dir, exist_ok=True)
+        with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+            z.extractall(target_dir)
+
+    elif mod_name == "Framerate Vigilante (60fps fix)":
+        url = "https://fs.xserv.pp.ua/files/Framerate%20Vigilante.zip"
+        response = net.get(url, timeout=60)
+        response.raise_for_status()
+        target_dir = os.path.join(game_path, "modloader", "FramerateVigilante")
+        os.makedirs(target_dir, exist_ok=True)
+        with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+            z.extractall(target_dir)
+
+    elif mod_name == "GInput":
+        url = "https://silent.rockstarvision.com/uploads/GInputSA.zip"
+        response = net.get(url, timeout=30)
+        response.raise_for_status()
+        target_dir = os.path.join(game_path, "modloader", "GInput")
+        os.makedirs(target_dir, exist_ok=True)
+        with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+            for member in z.namelist():
+                if "GInputAPI (for modders)" not in member:
+                    z.extract(member, target_dir)
+
+    elif mod_name == "Project 2DFX":
+        api_url = "https://api.github.com/repos/ThirteenAG/III.VC.SA.IV.Project2DFX/releases/tags/gtasa"
+        response = net.get(api_url, timeout=15)
+        response.raise_for_status()
+        assets = response.json().get("assets", [])
+        download_url = next((a["browser_download_url"] for a in assets if "gtasa" in a["name"].lower() and a["name"].endswith(".zip")), None)
+
+        if not download_url and assets:
+            download_url = next((a["browser_download_url"] for a in assets if a["name"].endswith(".zip")), None)
+
+        if download_url:
+            response = net.get(download_url, timeout=60)
+            response.raise_for_status()
+            target_dir = os.path.join(game_path, "modloader", "Project2DFX")
+            os.makedirs(target_dir, exist_ok=True)
+            with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+                z.extractall(target_dir)
+        else:
+            raise Exception("Could not find Project 2DFX zip for GTA SA in latest GitHub release.")
@@ -0,0 +1,77 @@
+import os
+import sys
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = 30
+# Hosts kept alive at once and connections kept per host. The per host pool
+# has to hold every segment of a ranged download.
+POOL_HOSTS = 8
+POOL_SIZE = 16
+MAX_TIMINGS = 200
+
+RETRY = Retry(total=3, connect=3, read=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+              allowed_methods=("GET", "HEAD", "POST"), respect_retry_after_header=True, raise_on_status=False)
+
+_lock = threading.Lock()
+_sessions = {}
+_timings = deque(maxlen=MAX_TIMINGS)
+
+def record_timing(response, *args, **kwargs):
+    parts = urlsplit(response.url)
+    # Download URLs carry tokens in the query, keep them out of the log.
+    entry = {
+        "method": response.request.method,
+        "url": f"{parts.scheme}://{parts.netloc}{parts.path}",
+        "status": response.status_code,
+        "elapsed_ms": response.elapsed.total_seconds() * 1000,
+    }
+    _timings.append(entry)
+    if os.environ.get("DOWNGRADER_TRACE_HTTP"):
+        print(f"[http] {entry['method']} {entry['url']} {entry['status']}: {entry['elapsed_ms']:.0f} ms",
+              file=sys.stderr)
+
+def get_session(retry=True):
+    with _lock:
+        session = _sessions.get(retry)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE,
+                                  max_retries=RETRY if retry else 0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.hooks["response"].append(record_timing)
+            _sessions[retry] = session
+        return session
+
+def get_timings():
+    # Time to response headers of the most recent requests, oldest first.
+    return list(_timings)
+
+def request(method, url, retry=True, **kwargs):
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    session = get_session(retry)
+    try:
+        return session.request(method, url, verify=True, **kwargs)
+    except requests.exceptions.SSLError:
+        # Only this request goes unverified, the next one checks the
+        # certificate again.
+        import urllib3
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        return session.request(method, url, verify=False, **kwargs)
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+def close():
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
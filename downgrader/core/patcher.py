@@ -0,0 +1,178 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from . import disk
+from . import backups
+from . import journal
+from . import hashing
+from . import xdelta
+from .hash_cache import file_identity
+from .paths import EXE_NAMES, alt_exe_name, resolve_game_file, get_creationflags
+from .scanner import get_file_size, size_matches, is_target, build_result
+
+def get_current_hash(rel_path, file_info, target_file, cache=None, scan_results=None):
+    scanned = (scan_results or {}).get(rel_path)
+    if scanned and scanned["full_path"] == target_file and scanned["identity"] is not None:
+        if file_identity(target_file) == scanned["identity"]:
+            return scanned["hash"]
+
+    if not size_matches(file_info, get_file_size(target_file)):
+        return None
+    return hashing.cached_md5(target_file, cache)
+
+def get_patch_workers(game_path):
+    try:
+        return max(1, int(os.environ["DOWNGRADER_PATCH_WORKERS"]))
+    except (KeyError, ValueError):
+        pass
+    # Parallel decodes only thrash a spinning disk.
+    if disk.is_rotational(game_path):
+        return 1
+    return max(1, min(4, os.cpu_count() or 1))
+
+def patch_files(game_path, manifest, xdelta_bin, patches_dir, cache=None, scan_results=None, progress_callback=None,
+                workers=None, delta_backups=False, cancel=None):
+    report_lock = threading.Lock()
+
+    def report(row, status, message=""):
+        if progress_callback:
+            with report_lock:
+                progress_callback(row, status, message)
+
+    creationflags = get_creationflags()
+    store = backups.BackupStore(game_path, cache)
+    patch_journal = journal.PatchJournal(game_path, manifest)
+
+    def patch_entry(i, file_info):
+        rel_path = file_info["path"]
+        action = file_info.get("action", "patch")
+        target_file = resolve_game_file(game_path, rel_path)
+        alt_path = os.path.join(game_path, alt_exe_name(os.path.basename(target_file)))
+        target_hash = file_info.get("target_hash")
+
+        if cancel is not None and cancel.cancelled:
+            report(i, "Cancelled")
+            return None
+
+        try:
+            current_hash = patch_journal.known_hash(rel_path, target_file)
+            if current_hash is None:
+                current_hash = get_current_hash(rel_path, file_info, target_file, cache, scan_results)
+
+            if is_target(rel_path, current_hash, target_hash):
+                report(i, "Already Patched")
+
+                if rel_path in EXE_NAMES and not os.path.exists(alt_path):
+                    disk.link_file(target_file, alt_path)
+                return True
+
+            report(i, "Backup & Patching...")
+
+            identity = file_identity(target_file)
+            if identity is not None and not patch_journal.has_backup(rel_path, target_file):
+                if current_hash is None:
+                    current_hash = hashing.cached_md5(target_file, cache)
+                store.backup(os.path.relpath(target_file, game_path), target_file, current_hash,
+                             file_info.get("source_hash"))
+                patch_journal.record(rel_path, journal.BACKED_UP, hash=current_hash, identity=identity)
+
+            if action == "copy":
+                source_patch = os.path.join(patches_dir, "gta_sa.exe")
+                disk.copy_file(source_patch, target_file)
+                patch_journal.record(rel_path, journal.COMMITTED, hash=target_hash, identity=file_identity(target_file))
+
+                if rel_path in EXE_NAMES:
+                    disk.link_file(target_file, alt_path)
+
+                report(i, "Success (Copy)")
+                return True
+
+            patch_file = os.path.join(patches_dir, f"{rel_path}.xdelta")
+            if not os.path.exists(patch_file):
+                report(i, "Failed", "Patch file missing")
+                return False
+
+            temp_output = target_file + ".tmp"
+            resumed = patch_journal.temp_state(rel_path, target_file)
+
+            output_hash = None
+            if resumed is None:
+                output_hash = xdelta.decode(xdelta_bin, target_file, patch_file, temp_output, creationflags)
+                if output_hash is None:
+                    report(i, "Failed", "xdelta error")
+                    if os.path.exists(temp_output): os.remove(temp_output)
+                    return False
+                patch_journal.record(rel_path, journal.DECODED, hash=current_hash, identity=identity,
+                                     temp_identity=file_identity(temp_output))
+            elif resumed == journal.DECODED:
+                output_hash = hashing.calculate_md5(temp_output)
+
+            if resumed != journal.VERIFIED:
+                if output_hash != target_hash:
+                    report(i, "Failed", "Patched file hash mismatch")
+                    os.remove(temp_output)
+                    return False
+                patch_journal.record(rel_path, journal.VERIFIED, hash=current_hash, identity=identity,
+                                     temp_identity=file_identity(temp_output))
+
+            os.replace(temp_output, target_file)
+            new_identity = file_identity(target_file)
+            patch_journal.record(rel_path, journal.COMMITTED, hash=target_hash, identity=new_identity)
+
+            # Only once the downgraded file is committed can the index describe
+            # the original as a delta against it. A failure leaves the full
+            # copy in place, the file itself is done.
+            message = ""
+            if delta_backups:
+                try:
+                    store.compact(os.path.relpath(target_file, game_path), target_file, target_hash, xdelta_bin)
+                except Exception as e:
+                    message = f"Backup not compacted: {e}"
+            if cache is not None:
+                cache.put(target_file, target_hash, new_identity)
+            if scan_results is not None:
+                scan_results[rel_path] = build_result(file_info, target_file, get_file_size(target_file), target_hash,
+                                                     new_identity)
+
+            if rel_path in EXE_NAMES:
+                disk.link_file(target_file, alt_path)
+
+            report(i, "Success", message)
+            return True
+        except Exception as e:
+            report(i, "Error", str(e))
+            return False
+
+    files = list(enumerate(manifest.get("files", [])))
+    target_files = []
+    for i, f in files:
+        target_file = resolve_game_file(game_path, f["path"])
+        target_files.append((f["path"], target_file))
+        if f["path"] in EXE_NAMES:
+            target_files.append((None, os.path.join(game_path, alt_exe_name(os.path.basename(target_file)))))
+    journal.remove_orphans(target_files, patch_journal)
+
+    # Both exe entries touch gta_sa.exe and gta-sa.exe, so they never run in parallel.
+    exe_entries = [(i, f) for i, f in files if f["path"] in EXE_NAMES]
+    other_entries = [(i, f) for i, f in files if f["path"] not in EXE_NAMES]
+
+    results = [patch_entry(i, f) for i, f in exe_entries]
+
+    if workers is None:
+        workers = get_patch_workers(game_path)
+    if workers <= 1 or len(other_entries) <= 1:
+        results += [patch_entry(i, f) for i, f in other_entries]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(other_entries))) as pool:
+            results += list(pool.map(lambda entry: patch_entry(*entry), other_entries))
+
+    cancelled = cancel is not None and cancel.cancelled
+    # A cancelled run keeps its journal so the next one resumes where it stopped.
+    patch_journal.close(complete=not cancelled)
+    if not cancelled:
+        store.prune()
+    if cache is not None:
+        cache.save()
+
+    success_count = sum(1 for ok in results if ok is True)
+    return success_count, sum(1 for ok in results if ok is False)
@@ -0,0 +1,93 @@
+import os
+import sys
+import platform
+
+EXE_NAMES = ["gta_sa.exe", "gta-sa.exe"]
+MANIFEST_PATH = "Patches/manifest.json"
+
+def get_resource_path(relative_path):
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_path, relative_path)
+
+def resolve_manifest_path():
+    if os.path.exists(MANIFEST_PATH):
+        return MANIFEST_PATH
+    return get_resource_path(MANIFEST_PATH)
+
+def find_xdelta_bin():
+    if platform.system() == "Windows":
+        xdelta_bin = get_resource_path(os.path.join("bin", "xdelta3.exe"))
+    else:
+        xdelta_bin = get_resource_path(os.path.join("bin", "xdelta3_linux"))
+
+    if not os.path.exists(xdelta_bin):
+        import shutil
+        xdelta_bin = shutil.which("xdelta3")
+    return xdelta_bin
+
+def get_creationflags():
+    import subprocess
+    if platform.system() == "Windows":
+        return subprocess.CREATE_NO_WINDOW
+    return 0
+
+def alt_exe_name(name):
+    return "gta-sa.exe" if name == "gta_sa.exe" else "gta_sa.exe"
+
+def resolve_game_file(game_path, rel_path):
+    full_path = os.path.join(game_path, rel_path)
+    if rel_path in EXE_NAMES and not os.path.exists(full_path):
+        alt_path = os.path.join(game_path, alt_exe_name(rel_path))
+        if os.path.exists(alt_path):
+            return alt_path
+    return full_path
+
+def find_game_path():
+    system = platform.system()
+
+    if system == "Windows":
+        try:
+            import winreg
+            registry_paths = [
+                (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Rockstar Games\Grand Theft Auto San Andreas\Installation", "ExePath"),
+                (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Rockstar Games\Grand Theft Auto San Andreas\Installation", "ExePath"),
+                (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Valve\Steam", "InstallPath"),
+                (winreg.HKEY_CURRENT_USER, r"Software\Valve\Steam", "SteamPath"),
+            ]
+
+            for root, key_path, value_name in registry_paths:
+                try:
+                    key = winreg.OpenKey(root, key_path)
+                    val, _ = winreg.QueryValueEx(key, value_name)
+                    winreg.CloseKey(key)
+
+                    if r"Valve\Steam" in key_path:
+                        val = os.path.join(val, "steamapps", "common", "Grand Theft Auto San Andreas")
+
+                    if os.path.exists(val):
+                        if os.path.isfile(val):
+                            val = os.path.dirname(val)
+                        if any(os.path.exists(os.path.join(val, e)) for e in EXE_NAMES):
+                            return val
+                except Exception:
+                    continue
+        except ImportError:
+            pass
+
+    elif system == "Linux":
+        home = os.path.expanduser("~")
+        common_paths = [
+            os.path.join(home, ".local/share/Steam/steamapps/common/Grand Theft Auto San Andreas"),
+            os.path.join(home, ".steam/steam/steamapps/common/Grand Theft Auto San Andreas"),
+            os.path.join(home, ".steam/root/steamapps/common/Grand Theft Auto San Andreas"),
+            os.path.join(home, ".var/app/com.valvesoftware.Steam/data/Steam/steamapps/common/Grand Theft Auto San Andreas"),
+            "/run/media/mmcblk0p1/steamapps/common/Grand Theft Auto San Andreas",
+        ]
+        for path in common_paths:
+            if os.path.exists(path) and any(os.path.exists(os.path.join(path, e)) for e in EXE_NAMES):
+                return path
+
+    return ""
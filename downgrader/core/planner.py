@@ -0,0 +1,107 @@
+import os
+import json
+import shutil
+from . import backups
+from .hash_cache import get_cache_dir
+from .patcher import get_patch_workers
+from .paths import EXE_NAMES, resolve_game_file
+from .scanner import get_file_size
+
+DEFAULT_THROUGHPUT = 100 * 1024 * 1024
+# Headroom kept free so the filesystem is never driven to zero mid-run.
+SAFETY_MARGIN = 64 * 1024 * 1024
+
+def get_throughput_path():
+    return os.path.join(get_cache_dir(), "throughput.json")
+
+def load_throughput():
+    try:
+        with open(get_throughput_path(), 'r') as f:
+            return float(json.load(f)["bytes_per_second"]) or DEFAULT_THROUGHPUT
+    except Exception:
+        return DEFAULT_THROUGHPUT
+
+def record_throughput(plan, elapsed):
+    moved = plan["read_bytes"] + plan["write_bytes"] + plan["backup_bytes"]
+    if elapsed <= 0 or moved < 16 * 1024 * 1024:
+        return
+    try:
+        os.makedirs(get_cache_dir(), exist_ok=True)
+        with open(get_throughput_path(), 'w') as f:
+            json.dump({"bytes_per_second": moved / elapsed}, f)
+    except Exception as e:
+        print(f"Failed to save throughput: {e}")
+
+def get_free_space(path):
+    if hasattr(os, "statvfs"):
+        st = os.statvfs(path)
+        return st.f_bavail * st.f_frsize
+    return shutil.disk_usage(path).free
+
+def plan_downgrade(game_path, manifest, patches_dir, scan_results=None, workers=None):
+    scan_results = scan_results or {}
+    store = backups.BackupStore(game_path, import_legacy=False)
+    files = []
+
+    for file_info in manifest.get("files", []):
+        rel_path = file_info["path"]
+        target_file = resolve_game_file(game_path, rel_path)
+        scanned = scan_results.get(rel_path)
+        current_size = get_file_size(target_file) or 0
+        target_size = file_info.get("target_size") or current_size
+
+        if file_info.get("action", "patch") == "copy":
+            action = "copy"
+            patch_file = os.path.join(patches_dir, "gta_sa.exe")
+        else:
+            action = "patch"
+            patch_file = os.path.join(patches_dir, f"{rel_path}.xdelta")
+
+        if scanned and scanned["needs_patch"] == "No":
+            action = "skip"
+        elif not os.path.exists(patch_file):
+            action = "missing_patch"
+
+        entry = {"path": rel_path, "action": action, "read_bytes": 0, "write_bytes": 0, "backup_bytes": 0,
+                 "temp_bytes": 0, "growth_bytes": 0}
+        if action in ("copy", "patch"):
+            patch_size = get_file_size(patch_file) or 0
+            entry["read_bytes"] = patch_size + (current_size if action == "patch" else 0)
+            entry["write_bytes"] = target_size
+            entry["temp_bytes"] = target_size
+            entry["growth_bytes"] = target_size - current_size
+
+            known_hash = scanned["hash"] if scanned else None
+            stored = store.get(os.path.relpath(target_file, game_path))
+            if current_size and not stored and not (known_hash and os.path.exists(store.blob_path(known_hash))):
+                entry["backup_bytes"] = current_size
+        files.append(entry)
+
+    if workers is None:
+        workers = get_patch_workers(game_path)
+    parallel_temps = sorted((f["temp_bytes"] for f in files if f["path"] not in EXE_NAMES), reverse=True)
+    exe_temps = [f["temp_bytes"] for f in files if f["path"] in EXE_NAMES]
+    peak_temp = max(sum(parallel_temps[:max(1, workers)]), max(exe_temps, default=0))
+
+    read_bytes = sum(f["read_bytes"] for f in files)
+    write_bytes = sum(f["write_bytes"] for f in files)
+    backup_bytes = sum(f["backup_bytes"] for f in files)
+    growth = sum(f["growth_bytes"] for f in files if f["growth_bytes"] > 0)
+    to_patch = sum(1 for f in files if f["action"] in ("copy", "patch"))
+    required = backup_bytes + growth + peak_temp + (SAFETY_MARGIN if to_patch else 0)
+    free = get_free_space(game_path)
+    throughput = load_throughput()
+
+    return {
+        "files": files,
+        "to_patch": to_patch,
+        "missing_patches": [f["path"] for f in files if f["action"] == "missing_patch"],
+        "read_bytes": read_bytes,
+        "write_bytes": write_bytes,
+        "backup_bytes": backup_bytes,
+        "peak_temp_bytes": peak_temp,
+        "required_bytes": required,
+        "free_bytes": free,
+        "fits": required <= free,
+        "estimated_seconds": (read_bytes + write_bytes + backup_bytes) / throughput,
+    }
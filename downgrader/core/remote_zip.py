@@ -0,0 +1,200 @@
+import os
+import json
+import shutil
+import zipfile
+import posixpath
+from . import download, net
+
+# End of central directory record plus the longest comment it can carry.
+TAIL_SIZE = 65535 + 22
+CHUNK_SIZE = 1024 * 1024
+MANIFEST_NAME = "manifest.json"
+
+class RemoteZipError(Exception):
+    pass
+
+class RangeFile:
+    # Read-only, seekable view of a remote file that zipfile can parse. The
+    # tail (end of central directory) is fetched once up front, everything
+    # else is read from a streamed range request that runs to the next
+    # boundary, so extracting one member costs one request.
+
+    def __init__(self, url, cancel=None):
+        self.url = url
+        self.cancel = cancel
+        self.pos = 0
+        self.response = None
+        self.response_pos = None
+        self.response_end = None
+        self.boundaries = []
+        self.transferred = 0
+        self.progress_callback = None
+
+        response = net.get(url, headers={"Range": f"bytes=-{TAIL_SIZE}"}, stream=True, timeout=60)
+        with response:
+            response.raise_for_status()
+            content_range = download.parse_content_range(response.headers.get("content-range"))
+            if response.status_code != 206 or not content_range or content_range[2] is None:
+                raise RemoteZipError("Server does not support range requests")
+            self.validators = download.get_validators(response.headers)
+            self.size = content_range[2]
+            self.tail_start = content_range[0]
+            self.tail = response.content
+        self.add_transferred(len(self.tail))
+
+    def add_transferred(self, count):
+        self.transferred += count
+        if self.progress_callback:
+            self.progress_callback(self.transferred)
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.pos
+        elif whence == os.SEEK_END:
+            offset += self.size
+        self.pos = max(0, offset)
+        return self.pos
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            n = self.size - self.pos
+        n = max(0, min(n, self.size - self.pos))
+        parts = []
+        while n > 0:
+            if self.pos >= self.tail_start:
+                offset = self.pos - self.tail_start
+                chunk = self.tail[offset:offset + n]
+            else:
+                chunk = self.read_stream(min(n, self.tail_start - self.pos))
+            parts.append(chunk)
+            self.pos += len(chunk)
+            n -= len(chunk)
+        return b"".join(parts)
+
+    def read_stream(self, n):
+        if self.cancel is not None:
+            self.cancel.check()
+        if self.response is None or self.response_pos != self.pos or self.pos > self.response_end:
+            self.open_stream()
+        chunk = self.response.raw.read(min(n, CHUNK_SIZE))
+        if not chunk:
+            raise RemoteZipError(f"Connection closed early at byte {self.pos}")
+        self.response_pos += len(chunk)
+        self.add_transferred(len(chunk))
+        return chunk
+
+    def open_stream(self):
+        self.close_stream()
+        end = min([b for b in self.boundaries if b > self.pos] + [self.tail_start]) - 1
+        headers = {"Range": f"bytes={self.pos}-{end}"}
+        if_range = self.validators.get("etag") or self.validators.get("last_modified")
+        if if_range:
+            headers["If-Range"] = if_range
+        response = net.get(self.url, headers=headers, stream=True, timeout=60)
+        response.raise_for_status()
+        content_range = download.parse_content_range(response.headers.get("content-range"))
+        if response.status_code != 206 or not content_range or content_range[0] != self.pos:
+            response.close()
+            raise RemoteZipError("The archive changed on the server")
+        self.response = response
+        self.response_pos = self.pos
+        self.response_end = end
+
+    def close_stream(self):
+        if self.response is not None:
+            self.response.close()
+            self.response = None
+
+    def close(self):
+        self.close_stream()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def member_names(manifest, paths):
+    # The archive members a downgrade of the given manifest paths reads.
+    names = []
+    for file_info in manifest.get("files", []):
+        if file_info["path"] not in paths:
+            continue
+        if file_info.get("action", "patch") == "copy":
+            names.append("gta_sa.exe")
+        else:
+            names.append(f"{file_info['path']}.xdelta")
+    return list(dict.fromkeys(names))
+
+def extract_member(z, info, target_dir, data=None):
+    dest = os.path.join(target_dir, *info.filename.split("/"))
+    root = os.path.realpath(target_dir)
+    if os.path.commonpath([root, os.path.realpath(dest)]) != root:
+        raise RemoteZipError(f"Refusing to extract {info.filename} outside of {target_dir}")
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+    # Written beside the old copy and renamed, so a failed fetch never leaves
+    # a truncated patch where a good one was.
+    temp_path = dest + ".download"
+    try:
+        with open(temp_path, 'wb') as out:
+            if data is not None:
+                out.write(data)
+            else:
+                with z.open(info) as src:
+                    shutil.copyfileobj(src, out, CHUNK_SIZE)
+        os.replace(temp_path, dest)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def extract_selected(url, target_dir, select, progress_callback=None, cancel=None):
+    # Reads the central directory and manifest.json over range requests, asks
+    # select(manifest) which manifest paths still need patching and fetches
+    # only their members. manifest.json is written last, so an interrupted
+    # run never pairs a new manifest with old patches.
+    with RangeFile(url, cancel) as f, zipfile.ZipFile(f) as z:
+        infos = z.infolist()
+        f.boundaries = sorted({i.header_offset for i in infos} | {z.start_dir})
+
+        manifests = [i for i in infos if posixpath.basename(i.filename) == MANIFEST_NAME]
+        if not manifests:
+            raise RemoteZipError("manifest.json not found in the archive")
+        manifest_info = min(manifests, key=lambda i: i.filename.count("/"))
+        prefix = posixpath.dirname(manifest_info.filename)
+        manifest_data = z.read(manifest_info)
+        manifest = json.loads(manifest_data)
+        # Don't hold the connection while select looks at the game files.
+        f.close_stream()
+
+        by_name = {i.filename: i for i in infos}
+        selected = [by_name[n] for n in (posixpath.join(prefix, name) for name in
+                                         member_names(manifest, set(select(manifest)))) if n in by_name]
+
+        def span(info):
+            return min(b for b in f.boundaries if b > info.header_offset) - info.header_offset
+
+        total = sum(span(i) for i in selected)
+        start = f.transferred
+        if progress_callback:
+            f.progress_callback = lambda transferred: progress_callback(min(transferred - start, total), total)
+            progress_callback(0, total)
+
+        os.makedirs(target_dir, exist_ok=True)
+        for info in selected:
+            extract_member(z, info, target_dir)
+        extract_member(z, manifest_info, target_dir, manifest_data)
+        if progress_callback:
+            # Members inside the prefetched tail never went through a stream.
+            progress_callback(total, total)
+
+        return {"members": len(selected), "transferred": f.transferred, "size": f.size}
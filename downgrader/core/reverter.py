@@ -0,0 +1,65 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from . import backups
+from . import hashing
+from .hash_cache import file_identity
+from .scanner import get_file_size
+
+def plan_revert(game_path, cache=None, scan_results=None, workers=None, progress_callback=None):
+    # Returns the backed up paths whose game file no longer matches the original.
+    store = backups.BackupStore(game_path, cache)
+    scanned = {r["full_path"]: r for r in (scan_results or {}).values()}
+
+    to_restore = []
+    to_hash = {}
+    for rel_path, entry in store.files.items():
+        target_file = os.path.join(game_path, rel_path)
+        size = get_file_size(target_file)
+        if size is None or size != entry["size"]:
+            to_restore.append(rel_path)
+            continue
+
+        known = scanned.get(target_file)
+        if known and known["identity"] is not None and known["identity"] == file_identity(target_file):
+            if known["hash"] != entry["md5"]:
+                to_restore.append(rel_path)
+            continue
+        to_hash[target_file] = rel_path
+
+    hashes = hashing.hash_files(list(to_hash), workers, progress_callback, cache)
+    for target_file, rel_path in to_hash.items():
+        if hashes.get(target_file, (None, None))[0] != store.files[rel_path]["md5"]:
+            to_restore.append(rel_path)
+
+    return store, sorted(to_restore)
+
+def revert_backups(game_path, cache=None, progress_callback=None, scan_results=None, workers=None):
+    store, to_restore = plan_revert(game_path, cache, scan_results, workers)
+    total = len(to_restore)
+    done = [0]
+    lock = threading.Lock()
+
+    failures = []
+
+    def restore(rel_path):
+        try:
+            store.restore(rel_path, os.path.join(game_path, rel_path))
+        except Exception as e:
+            failures.append(str(e))
+            return
+        if progress_callback:
+            with lock:
+                done[0] += 1
+                progress_callback(done[0], total, rel_path)
+
+    if workers is None:
+        workers = hashing.get_worker_count()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(restore, to_restore))
+
+    if cache is not None:
+        cache.save()
+    if failures:
+        raise OSError(f"{len(failures)} of {total} files could not be restored: {'; '.join(failures)}")
+    return total
@@ -0,0 +1,202 @@
+import os
+import json
+from . import hashing
+from . import fs_watch
+from .hash_cache import file_identity
+from .batching import UpdateBatcher
+from .cancel import Cancelled
+from .paths import EXE_NAMES, resolve_game_file
+
+VERSION_HASHES = {
+    "170b3a9108687b26da2d8901c6948a18": "v1.0 US (Hoodlum)",
+    "2b5066bd4097ac2944ce6a9cf8fe5677": "v1.0 US (Hoodlum + LAA Patch)",
+    "667f799c4ba8c9e1054fccaea6d4259b": "v1.0 US (Compact)",
+    "6c6160da9b175b66cf9127c86be57bf7": "v1.0 EU",
+    "49dd417760484a18017805df46b308b8": "v1.0 EU (Alt)",
+    "9f2d711dbf1fbbcda5ff9418a2cc1ef5": "v1.01 US",
+    "25405921d1c47747fd01fd0bfe0a05ae": "v1.01 EU",
+    "d9cb35c898d3298ca904a63e10ee18d9": "NewSteam R2 (German)",
+    "5bfd4dd83989a8264de4b8e771f237fd": "NewSteam R2",
+}
+
+LAA_HASH = "2b5066bd4097ac2944ce6a9cf8fe5677"
+
+def load_manifest(manifest_path):
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+def get_file_size(path):
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
+def size_matches(file_info, size):
+    if size is None:
+        return False
+    # Manifests generated before sizes were recorded have to be hashed.
+    if file_info.get("target_size") is None:
+        return True
+    return size in (file_info.get("target_size"), file_info.get("source_size"))
+
+def is_target(rel_path, current_hash, target_hash):
+    return current_hash == target_hash or (rel_path in EXE_NAMES and current_hash == LAA_HASH)
+
+def is_readonly(path):
+    try:
+        test_file = os.path.join(path, ".downgrader_test")
+        with open(test_file, 'w') as f:
+            f.write("test")
+        os.remove(test_file)
+        return False
+    except Exception:
+        return True
+
+def detect_version(path, cache=None, force=False):
+    detected_version = "Unknown"
+    for exe_name in EXE_NAMES:
+        exe_path = os.path.join(path, exe_name)
+        if os.path.exists(exe_path):
+            h = hashing.cached_md5(exe_path, cache, force)
+            if h in VERSION_HASHES:
+                detected_version = VERSION_HASHES[h]
+                break
+            else:
+                detected_version = f"Custom/Unknown ({h[:8]})"
+    return detected_version
+
+def classify(file_info, size, current_hash):
+    rel_path = file_info["path"]
+    display_hash = current_hash or "N/A"
+
+    if is_target(rel_path, current_hash, file_info["target_hash"]):
+        status = "Already Downgraded"
+        if rel_path in EXE_NAMES and current_hash == LAA_HASH:
+            status += " (LAA)"
+        needs_patch = "No"
+    elif current_hash == file_info["source_hash"]:
+        status = "Original (Needs Patch)"
+        needs_patch = "Yes"
+    elif size is None:
+        status = "Missing"
+        needs_patch = "N/A"
+    elif not size_matches(file_info, size):
+        status = "Modified"
+        needs_patch = "Yes (Force)"
+        display_hash = "N/A (size mismatch)"
+    elif current_hash is None:
+        status = "Missing"
+        needs_patch = "N/A"
+    else:
+        status = "Modified"
+        needs_patch = "Yes (Force)"
+
+    return status, needs_patch, display_hash
+
+def build_result(file_info, full_path, size, current_hash, identity):
+    status, needs_patch, display_hash = classify(file_info, size, current_hash)
+    return {
+        "path": file_info["path"],
+        "needs_patch": needs_patch,
+        "status": status,
+        "current_hash": display_hash,
+        "target_hash": file_info["target_hash"],
+        "full_path": full_path,
+        "hash": current_hash,
+        "identity": identity
+    }
+
+def pending_paths(path, manifest, results=None, cache=None):
+    # The manifest paths a downgrade of path would still have to touch. Hashes
+    # nothing: a file counts as done only if the last scan or the hash cache
+    # already vouches for its current contents, anything unknown is pending.
+    results = results or {}
+    pending = []
+    for file_info in manifest.get("files", []):
+        full_path = resolve_game_file(path, file_info["path"])
+        identity = file_identity(full_path)
+        current_hash = None
+        previous = results.get(file_info["path"])
+        if identity is not None and previous and previous["full_path"] == full_path and previous["identity"] == identity:
+            current_hash = previous["hash"]
+        elif identity is not None and cache is not None:
+            current_hash = cache.get(full_path, identity)
+        if not current_hash or not is_target(file_info["path"], current_hash, file_info["target_hash"]):
+            pending.append(file_info["path"])
+    return pending
+
+class Scanner:
+    def __init__(self, cache=None, workers=None):
+        self.cache = cache
+        self.workers = workers
+        self.watcher = None
+        self.results = {}
+
+    def get_dirty_paths(self, full_paths, force):
+        watch_paths = {fs_watch.normalize_path(p) for p in full_paths}
+        if self.watcher is not None and (self.watcher.stale or self.watcher.paths != watch_paths):
+            self.watcher.close()
+            self.watcher = None
+
+        if self.watcher is None:
+            self.watcher = fs_watch.create_watcher(watch_paths)
+            return None
+
+        dirty = self.watcher.take_dirty()
+        return None if force else dirty
+
+    def scan(self, path, manifest, force=False, progress_callback=None, watch=True, cancel=None):
+        try:
+            return self._scan(path, manifest, force, progress_callback, watch, cancel)
+        except Cancelled:
+            # The watcher's dirty set was already consumed, so the next scan
+            # must not trust the previous results.
+            self.close()
+            raise
+
+    def _scan(self, path, manifest, force, progress_callback, watch, cancel):
+        readonly = is_readonly(path)
+        detected_version = detect_version(path, self.cache, force)
+
+        files_to_check = manifest.get("files", [])
+        full_paths = [resolve_game_file(path, file_info["path"]) for file_info in files_to_check]
+
+        dirty = self.get_dirty_paths(full_paths, force) if watch else None
+        reused = []
+        for file_info, full_path in zip(files_to_check, full_paths):
+            previous = self.results.get(file_info["path"])
+            unchanged = dirty is not None and previous and previous["full_path"] == full_path
+            if unchanged and fs_watch.normalize_path(full_path) in dirty:
+                # Files the patcher just wrote come with their verified result.
+                unchanged = previous["identity"] is not None and previous["identity"] == file_identity(full_path)
+            reused.append(previous if unchanged else None)
+
+        sizes = [None if prev else get_file_size(p) for prev, p in zip(reused, full_paths)]
+        to_hash = [p for file_info, p, size, prev in zip(files_to_check, full_paths, sizes, reused)
+                   if not prev and size_matches(file_info, size)]
+
+        progress = UpdateBatcher(lambda batch: progress_callback(*batch[-1]) if progress_callback else None)
+        hashes = hashing.hash_files(to_hash, self.workers, lambda cur, tot: progress.add((cur, tot)),
+                                    self.cache, force, cancel)
+        progress.flush()
+        if self.cache is not None:
+            self.cache.save()
+        if not to_hash and progress_callback:
+            progress_callback(len(files_to_check), len(files_to_check))
+
+        results = []
+        for file_info, full_path, size, previous in zip(files_to_check, full_paths, sizes, reused):
+            if previous:
+                results.append(previous)
+                continue
+
+            current_hash, identity = hashes.get(full_path, (None, file_identity(full_path)))
+            results.append(build_result(file_info, full_path, size, current_hash, identity))
+
+        self.results = {r["path"]: r for r in results}
+        return results, detected_version, readonly
+
+    def close(self):
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
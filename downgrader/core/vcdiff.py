@@ -0,0 +1,287 @@
+import os
+import lzma
+import mmap
+import zlib
+
+# RFC 3284 decoder for the subset xdelta3 produces: default code table,
+# xdelta3's application header and Adler-32 window checksums, and LZMA
+# secondary compression. Anything else raises VcdiffError so callers can
+# fall back to the xdelta3 binary.
+
+MAGIC = b"\xd6\xc3\xc4"
+
+VCD_DECOMPRESS = 0x01
+VCD_CODETABLE = 0x02
+VCD_APPHEADER = 0x04
+
+VCD_SOURCE = 0x01
+VCD_TARGET = 0x02
+VCD_ADLER32 = 0x04
+
+VCD_DATACOMP = 0x01
+VCD_INSTCOMP = 0x02
+VCD_ADDRCOMP = 0x04
+
+SECONDARY_LZMA = 2
+
+NOOP, ADD, RUN, COPY = 0, 1, 2, 3
+S_NEAR, S_SAME = 4, 3
+
+class VcdiffError(Exception):
+    pass
+
+def build_code_table():
+    table = [(RUN, 0, 0, NOOP, 0, 0), (ADD, 0, 0, NOOP, 0, 0)]
+    table += [(ADD, size, 0, NOOP, 0, 0) for size in range(1, 18)]
+    for mode in range(9):
+        table.append((COPY, 0, mode, NOOP, 0, 0))
+        table += [(COPY, size, mode, NOOP, 0, 0) for size in range(4, 19)]
+    for mode in range(6):
+        for add_size in range(1, 5):
+            table += [(ADD, add_size, 0, COPY, size, mode) for size in range(4, 7)]
+    for mode in range(6, 9):
+        table += [(ADD, add_size, 0, COPY, 4, mode) for add_size in range(1, 5)]
+    table += [(COPY, 4, mode, ADD, 1, 0) for mode in range(9)]
+    # Drop the NOOP halves so the decode loop only sees real instructions.
+    return [tuple(op for op in ((t[0], t[1], t[2]), (t[3], t[4], t[5])) if op[0] != NOOP) for t in table]
+
+CODE_TABLE = build_code_table()
+
+def read_byte(f):
+    b = f.read(1)
+    if not b:
+        raise VcdiffError("Unexpected end of delta")
+    return b[0]
+
+def read_int(f):
+    value = 0
+    while True:
+        b = read_byte(f)
+        value = (value << 7) | (b & 0x7F)
+        if not b & 0x80:
+            return value
+
+def read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise VcdiffError("Unexpected end of delta")
+    return data
+
+def parse_int(buf, pos):
+    value = 0
+    while True:
+        if pos >= len(buf):
+            raise VcdiffError("Unexpected end of section")
+        b = buf[pos]
+        pos += 1
+        value = (value << 7) | (b & 0x7F)
+        if not b & 0x80:
+            return value, pos
+
+def decompress_section(data, decoder):
+    size, pos = parse_int(data, 0)
+    try:
+        out = decoder.decompress(data[pos:], size)
+    except lzma.LZMAError as e:
+        raise VcdiffError(f"Corrupt secondary section: {e}")
+    if len(out) != size:
+        raise VcdiffError("Secondary section size mismatch")
+    return out
+
+def decode_window(source, src_len, data, inst, addr, target_len):
+    out = bytearray(target_len)
+    near = [0] * S_NEAR
+    same = [0] * (S_SAME * 256)
+    next_slot = 0
+    table = CODE_TABLE
+    pos = data_pos = inst_pos = addr_pos = 0
+    inst_len = len(inst)
+
+    try:
+        while inst_pos < inst_len:
+            ops = table[inst[inst_pos]]
+            inst_pos += 1
+
+            for kind, size, mode in ops:
+                if size == 0:
+                    b = inst[inst_pos]
+                    inst_pos += 1
+                    if b < 0x80:
+                        size = b
+                    else:
+                        size, inst_pos = parse_int(inst, inst_pos - 1)
+                end = pos + size
+                if end > target_len:
+                    raise VcdiffError("Instruction overruns target window")
+
+                if kind == ADD:
+                    if data_pos + size > len(data):
+                        raise VcdiffError("Unexpected end of data section")
+                    out[pos:end] = data[data_pos:data_pos + size]
+                    data_pos += size
+                    pos = end
+                    continue
+                if kind == RUN:
+                    if data_pos >= len(data):
+                        raise VcdiffError("Unexpected end of data section")
+                    out[pos:end] = data[data_pos:data_pos + 1] * size
+                    data_pos += 1
+                    pos = end
+                    continue
+
+                here = src_len + pos
+                if mode < 2 + S_NEAR:
+                    b = addr[addr_pos]
+                    addr_pos += 1
+                    if b < 0x80:
+                        a = b
+                    else:
+                        a, addr_pos = parse_int(addr, addr_pos - 1)
+                    if mode == 1:
+                        a = here - a
+                    elif mode > 1:
+                        a += near[mode - 2]
+                else:
+                    a = same[(mode - 2 - S_NEAR) * 256 + addr[addr_pos]]
+                    addr_pos += 1
+                if a < 0 or a >= here:
+                    raise VcdiffError("Copy address out of range")
+
+                near[next_slot] = a
+                next_slot = (next_slot + 1) % S_NEAR
+                same[a % (S_SAME * 256)] = a
+
+                if a + size <= src_len:
+                    out[pos:end] = source[a:a + size]
+                    pos = end
+                    continue
+                if a < src_len:
+                    n = src_len - a
+                    out[pos:pos + n] = source[a:src_len]
+                    pos += n
+                    a = 0
+                else:
+                    a -= src_len
+                # What's left copies from the target window itself and may
+                # overlap the bytes being produced, which repeats out[a:pos].
+                while pos < end:
+                    n = pos - a
+                    if n > end - pos:
+                        n = end - pos
+                    out[pos:pos + n] = out[a:a + n]
+                    pos += n
+    except IndexError:
+        raise VcdiffError("Unexpected end of section")
+
+    if pos != target_len:
+        raise VcdiffError("Target window size mismatch")
+    if data_pos != len(data) or addr_pos != len(addr):
+        raise VcdiffError("Window sections not fully consumed")
+    return out
+
+def decode(source_file, delta_file, out_file, hasher=None):
+    # Malformed input must surface as VcdiffError, it is what sends callers to
+    # the xdelta3 fallback.
+    try:
+        _decode(source_file, delta_file, out_file, hasher)
+    except (lzma.LZMAError, IndexError, ValueError, OverflowError, MemoryError) as e:
+        raise VcdiffError(f"Malformed delta: {e}")
+
+def _decode(source_file, delta_file, out_file, hasher=None):
+    if read_exact(delta_file, 3) != MAGIC:
+        raise VcdiffError("Not a VCDIFF file")
+    read_byte(delta_file)
+
+    hdr = read_byte(delta_file)
+    secondary = None
+    if hdr & VCD_DECOMPRESS:
+        secondary = read_byte(delta_file)
+        if secondary != SECONDARY_LZMA:
+            raise VcdiffError(f"Unsupported secondary compressor {secondary}")
+    # xdelta3 keeps one LZMA stream per section type running across windows.
+    decoders = {flag: lzma.LZMADecompressor(lzma.FORMAT_XZ) for flag in (VCD_DATACOMP, VCD_INSTCOMP, VCD_ADDRCOMP)}
+    if hdr & VCD_CODETABLE:
+        raise VcdiffError("Custom code tables are not supported")
+    if hdr & VCD_APPHEADER:
+        read_exact(delta_file, read_int(delta_file))
+
+    source_size = os.fstat(source_file.fileno()).st_size if source_file else 0
+    source_map = None
+    if source_size:
+        source_map = mmap.mmap(source_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    written = 0
+    try:
+        while True:
+            b = delta_file.read(1)
+            if not b:
+                break
+            win = b[0]
+            if win & ~(VCD_SOURCE | VCD_TARGET | VCD_ADLER32):
+                raise VcdiffError(f"Unsupported window indicator {win:#x}")
+
+            src_len = src_pos = 0
+            if win & (VCD_SOURCE | VCD_TARGET):
+                src_len = read_int(delta_file)
+                src_pos = read_int(delta_file)
+
+            read_int(delta_file)
+            target_len = read_int(delta_file)
+            delta_ind = read_byte(delta_file)
+            data_len = read_int(delta_file)
+            inst_len = read_int(delta_file)
+            addr_len = read_int(delta_file)
+            checksum = None
+            if win & VCD_ADLER32:
+                checksum = int.from_bytes(read_exact(delta_file, 4), "big")
+
+            data = read_exact(delta_file, data_len)
+            inst = read_exact(delta_file, inst_len)
+            addr = read_exact(delta_file, addr_len)
+            if delta_ind and secondary is None:
+                raise VcdiffError("Compressed section without a secondary compressor")
+            if delta_ind & VCD_DATACOMP:
+                data = decompress_section(data, decoders[VCD_DATACOMP])
+            if delta_ind & VCD_INSTCOMP:
+                inst = decompress_section(inst, decoders[VCD_INSTCOMP])
+            if delta_ind & VCD_ADDRCOMP:
+                addr = decompress_section(addr, decoders[VCD_ADDRCOMP])
+
+            if win & VCD_TARGET:
+                if src_pos + src_len > written:
+                    raise VcdiffError("Target segment out of range")
+                out_file.flush()
+                out_file.seek(src_pos)
+                source = read_exact(out_file, src_len)
+                out_file.seek(written)
+            elif win & VCD_SOURCE:
+                if src_pos + src_len > source_size:
+                    raise VcdiffError("Source segment out of range")
+                source = memoryview(source_map)[src_pos:src_pos + src_len]
+            else:
+                source = b""
+
+            try:
+                window = decode_window(source, src_len, data, inst, addr, target_len)
+            finally:
+                if isinstance(source, memoryview):
+                    source.release()
+
+            if checksum is not None and zlib.adler32(window) != checksum:
+                raise VcdiffError("Window checksum mismatch")
+
+            out_file.write(window)
+            if hasher is not None:
+                hasher.update(window)
+            written += target_len
+    finally:
+        if source_map is not None:
+            source_map.close()
+
+def decode_file(source_path, patch_path, output_path, hasher=None):
+    with open(patch_path, 'rb') as delta_file, open(output_path, 'w+b') as out_file:
+        if source_path and os.path.exists(source_path):
+            with open(source_path, 'rb') as source_file:
+                decode(source_file, delta_file, out_file, hasher)
+        else:
+            decode(None, delta_file, out_file, hasher)
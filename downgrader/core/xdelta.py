@@ -0,0 +1,53 @@
+import os
+import hashlib
+import subprocess
+from . import hashing
+from . import vcdiff
+
+INPROCESS_MAX_PATCH_SIZE = 4 * 1024 * 1024
+
+def decode(xdelta_bin, source_file, patch_file, output_file, creationflags=0):
+    # Returns the MD5 of the decoded output, hashed as it is written, or None
+    # if decoding failed.
+    # Small patches are dominated by process startup, large ones decode
+    # faster in xdelta3 and don't hold the GIL while they do.
+    if not xdelta_bin or os.path.getsize(patch_file) <= INPROCESS_MAX_PATCH_SIZE:
+        hasher = hashlib.md5()
+        try:
+            vcdiff.decode_file(source_file, patch_file, output_file, hasher)
+            return hasher.hexdigest()
+        except vcdiff.VcdiffError:
+            if not xdelta_bin:
+                return None
+
+    hasher = hashlib.md5()
+    cmd = [xdelta_bin, "-d", "-c", "-s", source_file, patch_file]
+    try:
+        with open(output_file, 'wb') as out:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                    creationflags=creationflags)
+            completed = False
+            try:
+                with proc.stdout:
+                    for chunk in iter(lambda: proc.stdout.read(hashing.CHUNK_SIZE), b""):
+                        out.write(chunk)
+                        hasher.update(chunk)
+                completed = True
+            finally:
+                # A failed write must not leave xdelta3 running or unreaped.
+                if not completed:
+                    proc.kill()
+                returncode = proc.wait()
+    except OSError:
+        return None
+    return hasher.hexdigest() if returncode == 0 else None
+
+def encode(xdelta_bin, source_file, target_file, delta_file, creationflags=0):
+    if not xdelta_bin:
+        return False
+    cmd = [xdelta_bin, "-e", "-9", "-f", "-s", source_file, target_file, delta_file]
+    try:
+        result = subprocess.run(cmd, capture_output=True, creationflags=creationflags)
+    except OSError:
+        return False
+    return result.returncode == 0
@@ -1,16 +1,12 @@
-import requests
 import re
 import os
+import time
 import zipfile
-import io
+from core import download, net, remote_zip
+from core.cancel import Cancelled
 
-def safe_request(method, url, **kwargs):
-    try:
-        return method(url, verify=True, **kwargs)
-    except requests.exceptions.SSLError:
-        import urllib3
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-        return method(url, verify=False, **kwargs)
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 2
 
 def resolve_icloud_link(url):
     match = re.search(r'/iclouddrive/([^#?]+)', url)
@@ -23,7 +19,7 @@ def resolve_icloud_link(url):
     payload = {"shortGUIDs": [{"value": short_id}]}
     
     try:
-        response = safe_request(requests.post, resolve_url, json=payload, timeout=30)
+        response = net.post(resolve_url, json=payload, timeout=30)
         response.raise_for_status()
         data = response.json()
 
@@ -41,31 +37,65 @@ def resolve_icloud_link(url):
         print(f"Error resolving iCloud link: {e}")
         return None
 
-def download_and_extract_patches(url, target_dir, progress_callback=None):
+def download_and_extract_patches(url, target_dir, progress_callback=None, cancel=None, select=None):
+    # With select, only the members for the manifest paths it returns are
+    # fetched from the remote archive. Any failure there falls back to the
+    # whole download.
     download_url = resolve_icloud_link(url)
     if not download_url:
         return False
-        
+    if select is not None:
+        try:
+            remote_zip.extract_selected(download_url, target_dir, select, progress_callback, cancel)
+            return True
+        except Cancelled:
+            return False
+        except Exception as e:
+            print(f"Selective download failed, fetching the whole archive: {e}")
+    return download_and_extract(download_url, target_dir, progress_callback, cancel,
+                                resolve=lambda: resolve_icloud_link(url), source=url)
+
+def download_and_extract(download_url, target_dir, progress_callback=None, cancel=None, resolve=None, source=None):
+    # The archive is downloaded next to the target and extracted member by
+    # member, so memory use stays at a few chunks regardless of its size. An
+    # interrupted download leaves its part file and checkpoint behind and the
+    # next call resumes it.
+    archive_path = os.path.abspath(target_dir) + ".zip"
+
+    for attempt in range(MAX_ATTEMPTS):
+        if attempt:
+            # The resolved download URL expires, so every retry asks again.
+            if cancel is None:
+                time.sleep(RETRY_DELAY * attempt)
+            elif cancel.wait(RETRY_DELAY * attempt):
+                return False
+            download_url = resolve() if resolve else download_url
+            if not download_url:
+                return False
+        try:
+            download.download_file(download_url, archive_path, progress_callback, cancel, source=source)
+            break
+        except Cancelled:
+            return False
+        except Exception as e:
+            print(f"Download attempt {attempt + 1} failed: {e}")
+    else:
+        return False
+
     try:
-        response = safe_request(requests.get, download_url, stream=True, timeout=60)
-        response.raise_for_status()
-        
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded = 0
-        buffer = io.BytesIO()
-        
-        for chunk in response.iter_content(chunk_size=8192):
-            if chunk:
-                buffer.write(chunk)
-                downloaded += len(chunk)
-                if progress_callback:
-                    progress_callback(downloaded, total_size)
-        
-        with zipfile.ZipFile(buffer) as z:
-            os.makedirs(target_dir, exist_ok=True)
-            z.extractall(target_dir)
-            
-        return True
+        return extract_zip(archive_path, target_dir, cancel)
     except Exception as e:
-        print(f"Failed to download/extract: {e}")
-        return False
\ No newline at end of file
+        print(f"Failed to extract: {e}")
+        return False
+    finally:
+        if os.path.exists(archive_path):
+            os.remove(archive_path)
+
+def extract_zip(zip_path, target_dir, cancel=None):
+    os.makedirs(target_dir, exist_ok=True)
+    with zipfile.ZipFile(zip_path) as z:
+        for member in z.infolist():
+            if cancel is not None and cancel.cancelled:
+                return False
+            z.extract(member, target_dir)
+    return True
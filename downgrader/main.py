@@ -1,47 +1,144 @@
+import time
+STARTUP_TIME = time.perf_counter()
+# Longer than any startup network call can block (connect plus read timeout),
+# so closing the window never leaves one of those threads running.
+NETWORK_THREAD_WAIT_MS = 15000
+
 import sys
 import os
-import json
-import hashlib
-import requests
-import zipfile
-import io
-import time
+import platform
+from concurrent.futures import ThreadPoolExecutor
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QLineEdit, QPushButton, QGroupBox, QCheckBox,
-    QTableWidget, QTableWidgetItem, QHeaderView, QStatusBar,
+    QTableView, QHeaderView, QStatusBar,
     QFileDialog, QGridLayout, QMessageBox, QDialog, QProgressBar
 )
 from PySide6.QtGui import QIcon
-from PySide6.QtCore import Qt, QThread, Signal
+from PySide6.QtCore import Qt, QThread, Signal, QObject, QTimer, QAbstractTableModel, QModelIndex
 import linux_tools
 import icloud_resolver
 import updater
+from core import hash_cache, scanner, patcher, reverter, mods, paths, backups, planner
+from core.batching import UpdateBatcher
+from core.cancel import CancelToken, Cancelled
+
+def format_size(num_bytes):
+    for unit in ("B", "KB", "MB"):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.2f} GB"
+
+def format_duration(seconds):
+    m, s = divmod(int(seconds + 0.5), 60)
+    return f"{m:02d}:{s:02d}"
+
+class ConnectivityThread(QThread):
+    finished = Signal(bool)
+
+    def __init__(self, max_age):
+        super().__init__()
+        self.max_age = max_age
+
+    def run(self):
+        online = updater.has_internet(self.max_age)
+        if not self.isInterruptionRequested():
+            self.finished.emit(online)
+
+class ConnectivityService(QObject):
+    changed = Signal(bool)
+
+    def __init__(self, parent=None, ttl=updater.CONNECTIVITY_TTL):
+        super().__init__(parent)
+        self.ttl = ttl
+        self.online = None
+        self.thread = None
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(ttl * 1000)
+
+    def is_online(self):
+        return bool(self.online)
+
+    def refresh(self, force=False):
+        if self.thread is not None and self.thread.isRunning():
+            return
+        self.thread = ConnectivityThread(0 if force else self.ttl)
+        self.thread.finished.connect(self.set_online)
+        self.thread.start()
+
+    def set_online(self, online):
+        if online != self.online:
+            self.online = online
+            self.changed.emit(online)
+
+    def shutdown(self):
+        self.timer.stop()
+        if self.thread is not None and self.thread.isRunning():
+            self.thread.requestInterruption()
+            self.thread.wait(NETWORK_THREAD_WAIT_MS)
+
+class StartupThread(QThread):
+    connectivity_checked = Signal(bool)
+    update_checked = Signal(str, list)
+    steam_app_detected = Signal(str)
+
+    def run(self):
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            online = pool.submit(updater.has_internet)
+            update = pool.submit(updater.fetch_update)
+            steam_apps = pool.submit(linux_tools.get_steam_apps) if linux_tools.is_linux() else None
+
+            self.connectivity_checked.emit(online.result())
+            latest, assets = update.result()
+            if self.isInterruptionRequested():
+                return
+            self.update_checked.emit(latest or "", assets or [])
+            if steam_apps is not None:
+                apps = steam_apps.result()
+                if apps:
+                    self.steam_app_detected.emit(apps[0]["appid"])
 
 class DownloadThread(QThread):
     progress = Signal(int, int, float, float)
     finished = Signal(bool)
 
-    def __init__(self, url, target_dir):
+    def __init__(self, url, target_dir, game_path=None, cache=None, scan_results=None):
         super().__init__()
         self.url = url
         self.target_dir = target_dir
+        self.game_path = game_path
+        self.cache = cache
+        self.scan_results = scan_results
         self.start_time = 0
+        self.resumed_from = None
+        self.cancel = CancelToken()
 
     def run(self):
         self.start_time = time.time()
         
         def callback(downloaded, total):
+            # The first report carries the bytes an earlier run already saved,
+            # they don't count towards this run's speed.
+            if self.resumed_from is None:
+                self.resumed_from = downloaded
             elapsed = time.time() - self.start_time
-            speed = downloaded / elapsed if elapsed > 0 else 0
+            speed = (downloaded - self.resumed_from) / elapsed if elapsed > 0 else 0
             time_left = (total - downloaded) / speed if speed > 0 else 0
             self.progress.emit(downloaded, total, speed, time_left)
 
-        success = icloud_resolver.download_and_extract_patches(self.url, self.target_dir, callback)
+        select = None
+        if self.game_path and os.path.isdir(self.game_path):
+            # Only fetch the patches this install still needs.
+            select = lambda manifest: scanner.pending_paths(self.game_path, manifest, self.scan_results, self.cache)
+
+        success = icloud_resolver.download_and_extract_patches(self.url, self.target_dir, callback, self.cancel, select)
         self.finished.emit(success)
 
 class DownloadDialog(QDialog):
-    def __init__(self, url, target_dir):
+    def __init__(self, url, target_dir, game_path=None, cache=None, scan_results=None):
         super().__init__()
         self.setWindowTitle("Downloading Patches")
         self.setFixedSize(400, 150)
@@ -58,8 +155,12 @@ class DownloadDialog(QDialog):
         self.details_label = QLabel("0 MB / 0 MB (0 KB/s) - --:-- left")
         self.details_label.setStyleSheet("font-size: 10px; color: #666;")
         layout.addWidget(self.details_label)
+
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel)
+        layout.addWidget(self.cancel_btn)
         
-        self.thread = DownloadThread(url, target_dir)
+        self.thread = DownloadThread(url, target_dir, game_path, cache, scan_results)
         self.thread.progress.connect(self.update_progress)
         self.thread.finished.connect(self.on_finished)
         self.thread.start()
@@ -78,11 +179,19 @@ class DownloadDialog(QDialog):
             m, s = divmod(int(time_left), 60)
             time_str = f"{m:02d}:{s:02d}"
             
-            self.label.setText("Downloading patch assets...")
+            if self.thread.resumed_from:
+                self.label.setText(f"Downloading patch assets (resumed at {self.thread.resumed_from / 1048576:.1f} MB)...")
+            else:
+                self.label.setText("Downloading patch assets...")
             self.details_label.setText(f"{d_mb:.1f} MB / {t_mb:.1f} MB ({s_kb:.1f} KB/s) - {time_str} left")
 
+    def cancel(self):
+        self.cancel_btn.setEnabled(False)
+        self.label.setText("Cancelling...")
+        self.thread.cancel.cancel()
+
     def on_finished(self, success):
-        self.success = success
+        self.success = success and not self.thread.cancel.cancelled
         self.accept()
 
 class ModInstallThread(QThread):
@@ -93,188 +202,22 @@ class ModInstallThread(QThread):
         super().__init__()
         self.game_path = game_path
         self.selected_mods = selected_mods
+        self.cancel = CancelToken()
 
     def run(self):
         try:
-            priority_mods = ["ASI Loader", "ModLoader"]
-            to_install = [m for m in priority_mods if m in self.selected_mods]
-            to_install += [m for m in self.selected_mods if m not in priority_mods]
-
-            installed_already = set()
-            modloader_path = os.path.join(self.game_path, "modloader")
-            config_path = os.path.join(modloader_path, ".downgrader")
-            if os.path.exists(config_path):
-                try:
-                    with open(config_path, 'r') as f:
-                        data = json.load(f)
-                        installed_already = set(data.get("installed_mods", []))
-                except Exception:
-                    pass
-
-            for i, mod_name in enumerate(to_install):
-                self.progress.emit(i + 1, mod_name)
-                if mod_name in installed_already:
-                    continue
-                
-                self.apply_mod(mod_name)
-            
-            if os.path.exists(modloader_path):
-                try:
-                    installed = set()
-                    if os.path.exists(config_path):
-                        with open(config_path, 'r') as f:
-                            data = json.load(f)
-                            installed.update(data.get("installed_mods", []))
-                    
-                    installed.update(to_install)
-                    with open(config_path, 'w') as f:
-                        json.dump({"installed_mods": list(installed), "version": "0.1.1"}, f)
-                except Exception:
-                    pass
-
+            mods.install_mods(self.game_path, self.selected_mods, self.progress.emit, self.cancel)
             self.finished.emit(True, "")
+        except Cancelled:
+            self.finished.emit(False, "Cancelled.")
         except Exception as e:
             self.finished.emit(False, str(e))
 
-    def apply_mod(self, mod_name):
-        def safe_get(url, **kwargs):
-            try:
-                return requests.get(url, verify=True, **kwargs)
-            except requests.exceptions.SSLError:
-                import urllib3
-                urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-                return requests.get(url, verify=False, **kwargs)
-
-        if mod_name == "ASI Loader":
-            url = "https://silent.rockstarvision.com/uploads/silents_asi_loader_13.zip"
-            response = safe_get(url, timeout=30)
-            response.raise_for_status()
-            with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                to_extract = ["vorbisFile.dll", "vorbisHooked.dll"]
-                for file_name in to_extract:
-                    if file_name in z.namelist():
-                        with open(os.path.join(self.game_path, file_name), "wb") as f:
-                            f.write(z.read(file_name))
-                for member in z.namelist():
-                    if member.startswith("scripts/"):
-                        z.extract(member, self.game_path)
-        
-        elif mod_name == "ModLoader":
-            url = "https://fs.xserv.pp.ua/files/modloader.zip"
-            response = safe_get(url, timeout=30)
-            response.raise_for_status()
-            with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                z.extractall(self.game_path)
-
-        elif mod_name == "SilentPatch":
-            api_url = "https://api.github.com/repos/CookiePLMonster/SilentPatch/releases/latest"
-            response = safe_get(api_url, timeout=15)
-            response.raise_for_status()
-            assets = response.json().get("assets", [])
-            download_url = next((a["browser_download_url"] for a in assets if a["name"] == "SilentPatchSA.zip"), None)
-            
-            if download_url:
-                response = safe_get(download_url, timeout=30)
-                response.raise_for_status()
-                target_dir = os.path.join(self.game_path, "modloader", "SilentPatch")
-                os.makedirs(target_dir, exist_ok=True)
-                with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                    for member in z.namelist():
-                        if member.lower().endswith((".asi", ".ini")):
-                            filename = os.path.basename(member)
-                            if filename:
-                                with open(os.path.join(target_dir, filename), "wb") as f:
-                                    f.write(z.read(member))
-            else:
-                raise Exception("Could not find SilentPatchSA.zip in latest GitHub release.")
-
-        elif mod_name == "Widescreen Fixes":
-            fixes = [
-                ("https://github.com/ThirteenAG/WidescreenFixesPack/releases/download/gtasa/GTASA.WidescreenFix.zip", "WidescreenFix"),
-                ("https://github.com/ThirteenAG/WidescreenFixesPack/releases/download/gtasa/GTASA.WidescreenFrontend.zip", "WidescreenFrontend")
-            ]
-            for url, folder_name in fixes:
-                response = safe_get(url, timeout=60)
-                response.raise_for_status()
-                target_dir = os.path.join(self.game_path, "modloader", folder_name)
-                os.makedirs(target_dir, exist_ok=True)
-                with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                    z.extractall(target_dir)
-
-        elif mod_name == "SkyGFX":
-            api_url = "https://api.github.com/repos/aap/skygfx/releases/latest"
-            response = safe_get(api_url, timeout=15)
-            response.raise_for_status()
-            assets = response.json().get("assets", [])
-            download_url = next((a["browser_download_url"] for a in assets if "sa" in a["name"].lower() and a["name"].endswith(".zip")), None)
-            
-            if not download_url and assets:
-                download_url = next((a["browser_download_url"] for a in assets if a["name"].endswith(".zip")), None)
-
-            if download_url:
-                response = safe_get(download_url, timeout=60)
-                response.raise_for_status()
-                target_dir = os.path.join(self.game_path, "modloader", "SkyGFX")
-                os.makedirs(target_dir, exist_ok=True)
-                with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                    z.extractall(target_dir)
-            else:
-                raise Exception("Could not find SkyGFX zip in latest GitHub release.")
-
-        elif mod_name == "Frontend Mods":
-            url = "https://fs.xserv.pp.ua/files/Frontend%20Mods.zip"
-            response = safe_get(url, timeout=60)
-            response.raise_for_status()
-            target_dir = os.path.join(self.game_path, "modloader", "FrontendMods")
-            os.makedirs(target_dir, exist_ok=True)
-            with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                z.extractall(target_dir)
-
-        elif mod_name == "Framerate Vigilante (60fps fix)":
-            url = "https://fs.xserv.pp.ua/files/Framerate%20Vigilante.zip"
-            response = safe_get(url, timeout=60)
-            response.raise_for_status()
-            target_dir = os.path.join(self.game_path, "modloader", "FramerateVigilante")
-            os.makedirs(target_dir, exist_ok=True)
-            with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                z.extractall(target_dir)
-
-        elif mod_name == "GInput":
-            url = "https://silent.rockstarvision.com/uploads/GInputSA.zip"
-            response = safe_get(url, timeout=30)
-            response.raise_for_status()
-            target_dir = os.path.join(self.game_path, "modloader", "GInput")
-            os.makedirs(target_dir, exist_ok=True)
-            with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                for member in z.namelist():
-                    if "GInputAPI (for modders)" not in member:
-                        z.extract(member, target_dir)
-
-        elif mod_name == "Project 2DFX":
-            api_url = "https://api.github.com/repos/ThirteenAG/III.VC.SA.IV.Project2DFX/releases/tags/gtasa"
-            response = safe_get(api_url, timeout=15)
-            response.raise_for_status()
-            assets = response.json().get("assets", [])
-            download_url = next((a["browser_download_url"] for a in assets if "gtasa" in a["name"].lower() and a["name"].endswith(".zip")), None)
-            
-            if not download_url and assets:
-                download_url = next((a["browser_download_url"] for a in assets if a["name"].endswith(".zip")), None)
-
-            if download_url:
-                response = safe_get(download_url, timeout=60)
-                response.raise_for_status()
-                target_dir = os.path.join(self.game_path, "modloader", "Project2DFX")
-                os.makedirs(target_dir, exist_ok=True)
-                with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                    z.extractall(target_dir)
-            else:
-                raise Exception("Could not find Project 2DFX zip for GTA SA in latest GitHub release.")
-
 class ModInstallDialog(QDialog):
     def __init__(self, game_path, selected_mods):
         super().__init__()
         self.setWindowTitle("Installing Mods")
-        self.setFixedSize(400, 120)
+        self.setFixedSize(400, 150)
         self.setWindowFlags(Qt.Window | Qt.WindowTitleHint | Qt.CustomizeWindowHint)
         
         layout = QVBoxLayout(self)
@@ -284,6 +227,10 @@ class ModInstallDialog(QDialog):
         self.progress_bar = QProgressBar()
         self.progress_bar.setMaximum(len(selected_mods))
         layout.addWidget(self.progress_bar)
+
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel)
+        layout.addWidget(self.cancel_btn)
         
         self.thread = ModInstallThread(game_path, selected_mods)
         self.thread.progress.connect(self.update_progress)
@@ -297,6 +244,11 @@ class ModInstallDialog(QDialog):
         self.progress_bar.setValue(current)
         self.label.setText(f"Installing {mod_name}...")
 
+    def cancel(self):
+        self.cancel_btn.setEnabled(False)
+        self.label.setText("Cancelling after the current mod...")
+        self.thread.cancel.cancel()
+
     def on_finished(self, success, error_message):
         self.success = success
         self.error_message = error_message
@@ -383,7 +335,7 @@ class AboutDialog(QDialog):
         self.xdelta_license_view = QTextEdit()
         self.xdelta_license_view.setReadOnly(True)
         
-        license_path = get_resource_path(os.path.join("bin", "LICENSE.txt"))
+        license_path = paths.get_resource_path(os.path.join("bin", "LICENSE.txt"))
         if os.path.exists(license_path):
             with open(license_path, "r", encoding="utf-8") as f:
                 self.xdelta_license_view.setText(f.read())
@@ -402,7 +354,7 @@ class ToolsDialog(QDialog):
     def __init__(self, parent):
         super().__init__(parent)
         self.setWindowTitle("Downgrader Tools")
-        self.setFixedSize(300, 380)
+        self.setFixedSize(300, 410)
         self.parent = parent
         
         layout = QVBoxLayout(self)
@@ -412,12 +364,15 @@ class ToolsDialog(QDialog):
         
         path = self.parent.path_edit.text()
         has_path = bool(path and os.path.exists(path))
-        has_internet = updater.has_internet()
+        connectivity = self.parent.connectivity
+        has_internet = connectivity.is_online()
         has_patches = os.path.exists("Patches/manifest.json")
 
         self.download_btn = QPushButton("Download/Update Patches")
         self.download_btn.clicked.connect(self.download_patches)
         self.download_btn.setEnabled(has_internet)
+        connectivity.changed.connect(self.on_connectivity_changed)
+        connectivity.refresh()
         layout.addWidget(self.download_btn)
         
         self.revert_btn = QPushButton("Revert Downgrade (Restore Backups)")
@@ -451,8 +406,13 @@ class ToolsDialog(QDialog):
         self.cleanup_btn.setEnabled(has_path)
         layout.addWidget(self.cleanup_btn)
 
+        self.rescan_btn = QPushButton("Force Full Rescan (Ignore Hash Cache)")
+        self.rescan_btn.clicked.connect(self.force_rescan)
+        self.rescan_btn.setEnabled(has_path)
+        layout.addWidget(self.rescan_btn)
+
         if not has_internet and not has_patches:
-            for btn in [self.download_btn, self.revert_btn, self.reg_btn, self.laa_btn, self.shortcut_btn, self.clear_user_btn, self.cleanup_btn]:
+            for btn in [self.download_btn, self.revert_btn, self.reg_btn, self.laa_btn, self.shortcut_btn, self.clear_user_btn, self.cleanup_btn, self.rescan_btn]:
                 if hasattr(self, 'shortcut_btn') or btn != self.shortcut_btn:
                     btn.setEnabled(False)
             layout.addWidget(QLabel("<font color='red'>Internet required for initial setup.</font>"))
@@ -478,6 +438,18 @@ class ToolsDialog(QDialog):
         close_btn.clicked.connect(self.accept)
         layout.addWidget(close_btn)
 
+    def on_connectivity_changed(self, online):
+        self.download_btn.setEnabled(online)
+
+    def done(self, result):
+        # The service outlives the dialog, a later change must not reach a
+        # deleted button.
+        try:
+            self.parent.connectivity.changed.disconnect(self.on_connectivity_changed)
+        except (RuntimeError, TypeError):
+            pass
+        super().done(result)
+
     def fix_registry(self):
         import platform
         if platform.system() != "Windows":
@@ -607,14 +579,15 @@ class ToolsDialog(QDialog):
             QMessageBox.information(self, "Info", "No user data found.")
 
     def download_patches(self):
-        if not updater.has_internet():
+        if not self.parent.connectivity.is_online():
             QMessageBox.critical(self, "Error", "Internet connection required to download patches.")
             return
 
         self.accept()
         icloud_url = "https://www.icloud.com/iclouddrive/0afGK6zDBog_0drwp6YZoDLIg#Patches"
         target_dir = os.path.abspath("Patches")
-        dlg = DownloadDialog(icloud_url, target_dir)
+        dlg = DownloadDialog(icloud_url, target_dir, self.parent.path_edit.text(), self.parent.hash_cache,
+                             dict(self.parent.scan_engine.results))
         dlg.exec()
         if dlg.success:
             QMessageBox.information(self, "Success", "Patches downloaded successfully.")
@@ -625,6 +598,16 @@ class ToolsDialog(QDialog):
         self.accept()
         self.parent.revert_downgrade()
 
+    def force_rescan(self):
+        path = self.parent.path_edit.text()
+        if not path:
+            QMessageBox.warning(self, "Warning", "Select game path first.")
+            return
+
+        self.accept()
+        self.parent.hash_cache.clear(path)
+        self.parent.scan_directory(path, force=True)
+
     def cleanup_backups(self):
         path = self.parent.path_edit.text()
         if not path:
@@ -647,279 +630,191 @@ class ToolsDialog(QDialog):
         else:
             QMessageBox.information(self, "Info", "No backups found.")
 
-def calculate_md5(file_path):
-    hash_md5 = hashlib.md5()
-    try:
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
-    except Exception:
+class ResultsTableModel(QAbstractTableModel):
+    HEADERS = ["File", "Patch", "Status", "Current MD5", "Target MD5"]
+    KEYS = ["path", "needs_patch", "status", "current_hash", "target_hash"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self.rows[index.row()][self.KEYS[index.column()]]
         return None
 
-def get_resource_path(relative_path):
-    try:
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.dirname(os.path.abspath(__file__))
-    return os.path.join(base_path, relative_path)
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
 
-def find_game_path():
-    import platform
-    system = platform.system()
-    
-    if system == "Windows":
-        try:
-            import winreg
-            registry_paths = [
-                (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Rockstar Games\Grand Theft Auto San Andreas\Installation", "ExePath"),
-                (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Rockstar Games\Grand Theft Auto San Andreas\Installation", "ExePath"),
-                (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Valve\Steam", "InstallPath"),
-                (winreg.HKEY_CURRENT_USER, r"Software\Valve\Steam", "SteamPath"),
-            ]
-            
-            for root, key_path, value_name in registry_paths:
-                try:
-                    key = winreg.OpenKey(root, key_path)
-                    val, _ = winreg.QueryValueEx(key, value_name)
-                    winreg.CloseKey(key)
-                    
-                    if r"Valve\Steam" in key_path:
-                        val = os.path.join(val, "steamapps", "common", "Grand Theft Auto San Andreas")
-                    
-                    if os.path.exists(val):
-                        if os.path.isfile(val):
-                            val = os.path.dirname(val)
-                        if any(os.path.exists(os.path.join(val, e)) for e in ["gta_sa.exe", "gta-sa.exe"]):
-                            return val
-                except Exception:
-                    continue
-        except ImportError:
-            pass
-                
-    elif system == "Linux":
-        home = os.path.expanduser("~")
-        common_paths = [
-            os.path.join(home, ".local/share/Steam/steamapps/common/Grand Theft Auto San Andreas"),
-            os.path.join(home, ".steam/steam/steamapps/common/Grand Theft Auto San Andreas"),
-            os.path.join(home, ".steam/root/steamapps/common/Grand Theft Auto San Andreas"),
-            os.path.join(home, ".var/app/com.valvesoftware.Steam/data/Steam/steamapps/common/Grand Theft Auto San Andreas"),
-            "/run/media/mmcblk0p1/steamapps/common/Grand Theft Auto San Andreas",
-        ]
-        for path in common_paths:
-            if os.path.exists(path) and any(os.path.exists(os.path.join(path, e)) for e in ["gta_sa.exe", "gta-sa.exe"]):
-                return path
-                
-    return ""
-
-VERSION_HASHES = {
-    "170b3a9108687b26da2d8901c6948a18": "v1.0 US (Hoodlum)",
-    "2b5066bd4097ac2944ce6a9cf8fe5677": "v1.0 US (Hoodlum + LAA Patch)",
-    "667f799c4ba8c9e1054fccaea6d4259b": "v1.0 US (Compact)",
-    "6c6160da9b175b66cf9127c86be57bf7": "v1.0 EU",
-    "49dd417760484a18017805df46b308b8": "v1.0 EU (Alt)",
-    "9f2d711dbf1fbbcda5ff9418a2cc1ef5": "v1.01 US",
-    "25405921d1c47747fd01fd0bfe0a05ae": "v1.01 EU",
-    "d9cb35c898d3298ca904a63e10ee18d9": "NewSteam R2 (German)",
-    "5bfd4dd83989a8264de4b8e771f237fd": "NewSteam R2",
-}
+    def set_results(self, results):
+        self.beginResetModel()
+        self.rows = [{key: r[key] for key in self.KEYS} for r in results]
+        self.endResetModel()
+
+    def set_statuses(self, updates):
+        changed = []
+        for row, status, message in updates:
+            if 0 <= row < len(self.rows):
+                self.rows[row]["status"] = f"{status} ({message})" if message else status
+                changed.append(row)
+
+        if changed:
+            self.dataChanged.emit(self.index(min(changed), 2), self.index(max(changed), 2), [Qt.DisplayRole])
+        return changed
 
 class ScannerThread(QThread):
     progress = Signal(int, int)
     finished = Signal(list, str, bool)
+    cancelled = Signal()
 
-    def __init__(self, path, manifest_path):
+    def __init__(self, engine, path, manifest_path, force=False, cancel=None):
         super().__init__()
+        self.engine = engine
         self.path = path
         self.manifest_path = manifest_path
+        self.force = force
+        self.cancel = cancel or CancelToken()
 
     def run(self):
-        detected_version = "Unknown"
-        is_readonly = False
-        
         try:
-            test_file = os.path.join(self.path, ".downgrader_test")
-            with open(test_file, 'w') as f:
-                f.write("test")
-            os.remove(test_file)
+            manifest = scanner.load_manifest(self.manifest_path)
         except Exception:
-            is_readonly = True
-
-        for exe_name in ["gta_sa.exe", "gta-sa.exe"]:
-            exe_path = os.path.join(self.path, exe_name)
-            if os.path.exists(exe_path):
-                h = calculate_md5(exe_path)
-                if h in VERSION_HASHES:
-                    detected_version = VERSION_HASHES[h]
-                    break
-                else:
-                    detected_version = f"Custom/Unknown ({h[:8]})"
+            detected_version = scanner.detect_version(self.path, self.engine.cache, self.force)
+            self.finished.emit([], detected_version, scanner.is_readonly(self.path))
+            return
 
         try:
-            with open(self.manifest_path, 'r') as f:
-                manifest = json.load(f)
-        except Exception:
-            self.finished.emit([], detected_version, is_readonly)
+            results, detected_version, is_readonly = self.engine.scan(
+                self.path, manifest, self.force, lambda cur, tot: self.progress.emit(cur, tot), cancel=self.cancel)
+        except Cancelled:
+            self.cancelled.emit()
             return
+        self.finished.emit(results, detected_version, is_readonly)
 
-        files_to_check = manifest.get("files", [])
-        total = len(files_to_check)
-        results = []
+class ScanCoordinator(QObject):
+    # Runs at most one scan at a time. New requests are debounced, cancel the
+    # running scan and start once it has stopped; results of a scan that was
+    # superseded are dropped.
+    progress = Signal(int, int)
+    finished = Signal(list, str, bool)
 
-        for i, file_info in enumerate(files_to_check):
-            rel_path = file_info["path"]
-            full_path = os.path.join(self.path, rel_path)
-            
-            if rel_path in ["gta_sa.exe", "gta-sa.exe"] and not os.path.exists(full_path):
-                alt_name = "gta-sa.exe" if rel_path == "gta_sa.exe" else "gta_sa.exe"
-                alt_path = os.path.join(self.path, alt_name)
-                if os.path.exists(alt_path):
-                    full_path = alt_path
-
-            current_hash = calculate_md5(full_path)
-            target_hash = file_info["target_hash"]
-            source_hash = file_info["source_hash"]
-
-            status = "Ready"
-            needs_patch = "No"
-
-            is_already_patched = (current_hash == target_hash)
-            is_laa = (rel_path in ["gta_sa.exe", "gta-sa.exe"] and current_hash == "2b5066bd4097ac2944ce6a9cf8fe5677")
-
-            if is_already_patched or is_laa:
-                status = "Already Downgraded"
-                if is_laa:
-                    status += " (LAA)"
-                needs_patch = "No"
-            elif current_hash == source_hash:
-                status = "Original (Needs Patch)"
-                needs_patch = "Yes"
-            elif current_hash is None:
-                status = "Missing"
-                needs_patch = "N/A"
-            else:
-                status = "Modified"
-                needs_patch = "Yes (Force)"
-
-            results.append({
-                "path": rel_path,
-                "needs_patch": needs_patch,
-                "status": status,
-                "current_hash": current_hash or "N/A",
-                "target_hash": target_hash
-            })
-            self.progress.emit(i + 1, total)
+    DEBOUNCE_MS = 250
 
-        self.finished.emit(results, detected_version, is_readonly)
+    def __init__(self, engine, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.thread = None
+        self.pending = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DEBOUNCE_MS)
+        self.timer.timeout.connect(self.start_pending)
+
+    def is_scanning(self):
+        return self.thread is not None or self.pending is not None
+
+    def request(self, path, manifest_path, force=False):
+        if self.pending and self.pending[0] == path:
+            force = force or self.pending[2]
+        self.pending = (path, manifest_path, force)
+        if self.thread is not None:
+            self.thread.cancel.cancel()
+        self.timer.start()
+
+    def start_pending(self):
+        if self.thread is not None or self.pending is None:
+            return
+        path, manifest_path, force = self.pending
+        self.pending = None
+
+        thread = ScannerThread(self.engine, path, manifest_path, force)
+        thread.progress.connect(lambda cur, tot: self.on_progress(thread, cur, tot))
+        thread.finished.connect(lambda results, version, readonly: self.on_done(thread, (results, version, readonly)))
+        thread.cancelled.connect(lambda: self.on_done(thread, None))
+        self.thread = thread
+        thread.start()
+
+    def on_progress(self, thread, current, total):
+        if thread is self.thread and not thread.cancel.cancelled:
+            self.progress.emit(current, total)
+
+    def on_done(self, thread, result):
+        thread.wait()
+        if thread is not self.thread:
+            return
+        self.thread = None
+        if result is not None and not thread.cancel.cancelled and self.pending is None:
+            self.finished.emit(*result)
+        if self.pending is not None and not self.timer.isActive():
+            self.start_pending()
+
+    def shutdown(self):
+        self.timer.stop()
+        self.pending = None
+        if self.thread is not None:
+            self.thread.cancel.cancel()
+            self.thread.wait()
+            self.thread = None
 
 class PatchThread(QThread):
-    file_progress = Signal(int, str, str)
+    file_progress = Signal(list)
     finished = Signal(int, int)
 
-    def __init__(self, game_path, manifest, xdelta_bin, patches_dir):
+    def __init__(self, game_path, manifest, xdelta_bin, patches_dir, cache=None, scan_results=None, plan=None,
+                 delta_backups=False):
         super().__init__()
         self.game_path = game_path
         self.manifest = manifest
         self.xdelta_bin = xdelta_bin
         self.patches_dir = patches_dir
+        self.cache = cache
+        self.scan_results = scan_results or {}
+        self.plan = plan
+        self.delta_backups = delta_backups
+        self.cancel = CancelToken()
+        self.updates = UpdateBatcher(lambda batch: self.file_progress.emit(batch))
 
     def run(self):
-        import subprocess
-        import shutil
-        import platform
-
-        creationflags = 0
-        if platform.system() == "Windows":
-            creationflags = subprocess.CREATE_NO_WINDOW
-
-        success_count = 0
-        fail_count = 0
-        
-        backup_dir = os.path.join(self.game_path, "backups")
-        os.makedirs(backup_dir, exist_ok=True)
-
-        files = self.manifest.get("files", [])
-        for i, file_info in enumerate(files):
-            rel_path = file_info["path"]
-            action = file_info.get("action", "patch")
-            
-            target_file = os.path.join(self.game_path, rel_path)
-            
-            if rel_path in ["gta_sa.exe", "gta-sa.exe"] and not os.path.exists(target_file):
-                alt_name = "gta-sa.exe" if rel_path == "gta_sa.exe" else "gta_sa.exe"
-                alt_path = os.path.join(self.game_path, alt_name)
-                if os.path.exists(alt_path):
-                    target_file = alt_path
-
-            target_hash = file_info.get("target_hash")
-            current_hash = calculate_md5(target_file)
-            is_laa = (rel_path in ["gta_sa.exe", "gta-sa.exe"] and current_hash == "2b5066bd4097ac2944ce6a9cf8fe5677")
-            
-            if current_hash == target_hash or is_laa:
-                self.file_progress.emit(i, "Already Patched", "")
-                
-                if rel_path in ["gta_sa.exe", "gta-sa.exe"]:
-                    alt_name = "gta-sa.exe" if target_file.endswith("gta_sa.exe") else "gta_sa.exe"
-                    alt_path = os.path.join(self.game_path, alt_name)
-                    if not os.path.exists(alt_path):
-                        shutil.copy2(target_file, alt_path)
-
-                success_count += 1
-                continue
+        start = time.perf_counter()
+        success_count, fail_count = patcher.patch_files(
+            self.game_path, self.manifest, self.xdelta_bin, self.patches_dir, self.cache, self.scan_results,
+            lambda row, status, message: self.updates.add((row, status, message)), delta_backups=self.delta_backups,
+            cancel=self.cancel)
+        if self.plan:
+            planner.record_throughput(self.plan, time.perf_counter() - start)
+        self.updates.flush()
+        self.finished.emit(success_count, fail_count)
 
-            self.file_progress.emit(i, "Backup & Patching...", "")
-            
-            try:
-                if os.path.exists(target_file):
-                    rel_dir = os.path.dirname(rel_path)
-                    dest_backup_dir = os.path.join(backup_dir, rel_dir)
-                    os.makedirs(dest_backup_dir, exist_ok=True)
-                    shutil.copy2(target_file, os.path.join(backup_dir, rel_path))
-
-                if action == "copy":
-                    source_patch = os.path.join(self.patches_dir, "gta_sa.exe")
-                    shutil.copy2(source_patch, target_file)
-                    
-                    if rel_path in ["gta_sa.exe", "gta-sa.exe"]:
-                        alt_name = "gta-sa.exe" if target_file.endswith("gta_sa.exe") else "gta_sa.exe"
-                        alt_path = os.path.join(self.game_path, alt_name)
-                        shutil.copy2(source_patch, alt_path)
-                        
-                    success_count += 1
-                    self.file_progress.emit(i, "Success (Copy)", "")
-                else:
-                    patch_file = os.path.join(self.patches_dir, f"{rel_path}.xdelta")
-                    if not os.path.exists(patch_file):
-                        self.file_progress.emit(i, "Failed", "Patch file missing")
-                        fail_count += 1
-                        continue
-                    
-                    temp_output = target_file + ".tmp"
-                    cmd = [self.xdelta_bin, "-d", "-s", target_file, patch_file, temp_output]
-                    result = subprocess.run(cmd, capture_output=True, text=True, creationflags=creationflags)
-                    
-                    if result.returncode == 0:
-                        os.replace(temp_output, target_file)
-                        
-                        if rel_path in ["gta_sa.exe", "gta-sa.exe"]:
-                            alt_name = "gta-sa.exe" if target_file.endswith("gta_sa.exe") else "gta_sa.exe"
-                            alt_path = os.path.join(self.game_path, alt_name)
-                            shutil.copy2(target_file, alt_path)
-
-                        success_count += 1
-                        self.file_progress.emit(i, "Success", "")
-                    else:
-                        fail_count += 1
-                        self.file_progress.emit(i, "Failed", "xdelta error")
-                        if os.path.exists(temp_output): os.remove(temp_output)
-            except Exception as e:
-                self.file_progress.emit(i, "Error", str(e))
-                fail_count += 1
+class RevertThread(QThread):
+    progress = Signal(int, int)
+    finished = Signal(int)
+    error = Signal(str)
 
-        self.finished.emit(success_count, fail_count)
+    def __init__(self, game_path, cache=None, scan_results=None):
+        super().__init__()
+        self.game_path = game_path
+        self.cache = cache
+        self.scan_results = scan_results or {}
+        self.updates = UpdateBatcher(lambda batch: self.progress.emit(*batch[-1]))
 
-    def status_bar_msg(self, msg):
-        pass
+    def run(self):
+        try:
+            restored = reverter.revert_backups(self.game_path, self.cache,
+                                               lambda cur, tot, name: self.updates.add((cur, tot)),
+                                               self.scan_results)
+        except Exception as e:
+            self.error.emit(str(e))
+            return
+        self.updates.flush()
+        self.finished.emit(restored)
 
 class DowngraderApp(QMainWindow):
     def __init__(self):
@@ -930,117 +825,117 @@ class DowngraderApp(QMainWindow):
         self.manifest_data = None
         self.detected_appid = None
         self.is_v10_us = False
+        self.hash_cache = hash_cache.HashCache()
+        self.scan_engine = scanner.Scanner(self.hash_cache)
+        self.scan_coordinator = ScanCoordinator(self.scan_engine, self)
+        self.scan_coordinator.progress.connect(lambda cur, tot: self.status_bar.showMessage(f"Scanning: {cur}/{tot}"))
+        self.scan_coordinator.finished.connect(self.update_table)
+        self.has_scanned = False
+        self.has_patches = False
+        self.startup_timings = {}
 
         self.init_ui()
+
+        self.connectivity = ConnectivityService(self)
+        self.connectivity.changed.connect(self.apply_connectivity)
         
-        auto_path = find_game_path()
+        auto_path = paths.find_game_path()
         if auto_path:
             self.path_edit.setText(auto_path)
 
-    def check_patches_and_start(self):
-        if updater.has_internet():
-            latest, assets = updater.check_for_updates()
-            if latest:
-                system = platform.system()
-                download_url = None
-                for asset in assets:
-                    if system == "Windows" and asset["name"].endswith(".exe"):
-                        if updater.is_offline():
-                            if "installer" in asset["name"].lower():
-                                download_url = asset["browser_download_url"]
-                                break
-                        else:
-                            if "installer" not in asset["name"].lower():
-                                download_url = asset["browser_download_url"]
-                                break
-                    elif system == "Linux" and asset["name"].lower().endswith(".appimage"):
-                        if updater.is_offline():
-                            if "offline" in asset["name"].lower():
-                                download_url = asset["browser_download_url"]
-                                break
-                        else:
-                            if "offline" not in asset["name"].lower():
-                                download_url = asset["browser_download_url"]
-                                break
-                
-                if not download_url and assets:
-                    for asset in assets:
-                        if system == "Windows" and asset["name"].endswith(".exe"):
-                            download_url = asset["browser_download_url"]
-                            break
-                        elif system == "Linux" and asset["name"].lower().endswith(".appimage"):
-                            download_url = asset["browser_download_url"]
-                            break
-
-                if download_url:
-                    if updater.is_offline():
-                        self.update_btn.setVisible(True)
-                        self.update_btn.clicked.connect(lambda: self.trigger_update(latest, download_url))
-                        self.status_bar.showMessage(f"Notification: New version {latest} available!")
-                    else:
-                        reply = QMessageBox.question(self, "Update Available", 
-                            f"A new version ({latest}) is available. Would you like to update now?",
-                            QMessageBox.Yes | QMessageBox.No)
-                        if reply == QMessageBox.Yes:
-                            self.status_bar.showMessage("Downloading update...")
-                            updater.run_update_script(download_url)
-                            return
-                else:
-                    QMessageBox.warning(self, "Update Error", "Could not find a matching download for your platform.")
+    def mark_startup(self, event):
+        if event in self.startup_timings:
+            return
+        elapsed_ms = (time.perf_counter() - STARTUP_TIME) * 1000
+        self.startup_timings[event] = elapsed_ms
+        if os.environ.get("DOWNGRADER_TRACE_STARTUP"):
+            print(f"[startup] {event}: {elapsed_ms:.0f} ms")
 
-        self.resolved_manifest_path = "Patches/manifest.json"
-        if not os.path.exists(self.resolved_manifest_path):
-            self.resolved_manifest_path = get_resource_path("Patches/manifest.json")
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        self.mark_startup("first_paint")
+
+    def start_bootstrap(self):
+        self.resolved_manifest_path = paths.resolve_manifest_path()
+        self.has_patches = os.path.exists(self.resolved_manifest_path)
+
+        if self.has_patches:
+            if self.path_edit.text():
+                self.scan_directory(self.path_edit.text())
+        else:
+            self.status_bar.showMessage("Patches missing. Checking internet connection...")
+
+        self.startup_thread = StartupThread()
+        self.startup_thread.connectivity_checked.connect(self.on_connectivity_checked)
+        self.startup_thread.update_checked.connect(self.on_update_checked)
+        self.startup_thread.steam_app_detected.connect(self.on_steam_app_detected)
+        self.startup_thread.start()
+
+    def on_connectivity_checked(self, online):
+        self.mark_startup("connectivity_checked")
+        self.connectivity.set_online(online)
+        if not self.has_patches:
+            self.handle_missing_patches(online)
+
+    def on_steam_app_detected(self, appid):
+        self.detected_appid = appid
+        self.status_bar.showMessage(f"Linux detected. Steam AppID: {self.detected_appid}")
+
+    def on_update_checked(self, latest, assets):
+        self.mark_startup("update_checked")
+        if not latest:
+            return
+
+        download_url = updater.find_update_download_url(assets)
+        if download_url:
+            if updater.is_offline():
+                self.update_btn.setVisible(True)
+                self.update_btn.clicked.connect(lambda: self.trigger_update(latest, download_url))
+                self.status_bar.showMessage(f"Notification: New version {latest} available!")
+            else:
+                reply = QMessageBox.question(self, "Update Available", 
+                    f"A new version ({latest}) is available. Would you like to update now?",
+                    QMessageBox.Yes | QMessageBox.No)
+                if reply == QMessageBox.Yes:
+                    self.status_bar.showMessage("Downloading update...")
+                    updater.run_update_script(download_url)
+        else:
+            QMessageBox.warning(self, "Update Error", "Could not find a matching download for your platform.")
+
+    def handle_missing_patches(self, has_internet):
+        if not has_internet:
+            QMessageBox.critical(self, "Fatal Error", 
+                "Patches are missing and no internet connection was detected.\n\n"
+                "The application cannot function without patch assets or internet to download them.")
+            QApplication.instance().exit(1)
+            return
+
+        reply = QMessageBox.question(self, "Patches Missing", 
+            "Patches folder not found. Would you like to download them from iCloud?",
+            QMessageBox.Yes | QMessageBox.No)
+        
+        if reply == QMessageBox.Yes:
+            icloud_url = "https://www.icloud.com/iclouddrive/0afGK6zDBog_0drwp6YZoDLIg#Patches"
+            target_dir = os.path.abspath("Patches")
             
-        has_patches = os.path.exists(self.resolved_manifest_path)
-        has_internet = updater.has_internet()
-
-        if not has_patches:
-            if not has_internet:
-                QMessageBox.critical(self, "Fatal Error", 
-                    "Patches are missing and no internet connection was detected.\n\n"
-                    "The application cannot function without patch assets or internet to download them.")
-                sys.exit(1)
-
-            reply = QMessageBox.question(self, "Patches Missing", 
-                "Patches folder not found. Would you like to download them from iCloud?",
-                QMessageBox.Yes | QMessageBox.No)
+            dlg = DownloadDialog(icloud_url, target_dir, self.path_edit.text(), self.hash_cache,
+                                 dict(self.scan_engine.results))
+            dlg.exec()
             
-            if reply == QMessageBox.Yes:
-                icloud_url = "https://www.icloud.com/iclouddrive/0afGK6zDBog_0drwp6YZoDLIg#Patches"
-                target_dir = os.path.abspath("Patches")
-                
-                dlg = DownloadDialog(icloud_url, target_dir)
-                dlg.exec()
-                
-                if dlg.success:
-                    if os.path.exists("Patches/manifest.json"):
-                        self.resolved_manifest_path = "Patches/manifest.json"
-                        self.show()
-                        if self.path_edit.text():
-                            self.scan_directory(self.path_edit.text())
-                    else:
-                        QMessageBox.critical(self, "Error", "Download finished but manifest.json is still missing.")
-                        sys.exit(1)
+            if dlg.success:
+                if os.path.exists("Patches/manifest.json"):
+                    self.resolved_manifest_path = "Patches/manifest.json"
+                    self.has_patches = True
+                    if self.path_edit.text():
+                        self.scan_directory(self.path_edit.text())
                 else:
-                    QMessageBox.critical(self, "Error", "Failed to download patches.")
-                    sys.exit(1)
+                    QMessageBox.critical(self, "Error", "Download finished but manifest.json is still missing.")
+                    QApplication.instance().exit(1)
             else:
-                self.status_bar.showMessage("Warning: Patches missing. Downgrade will be disabled.")
-                self.show()
-                if self.path_edit.text():
-                    self.scan_directory(self.path_edit.text())
+                QMessageBox.critical(self, "Error", "Failed to download patches.")
+                QApplication.instance().exit(1)
         else:
-            self.show()
-            if self.path_edit.text():
-                self.scan_directory(self.path_edit.text())
-
-        if not has_internet:
-            self.status_bar.showMessage("Offline Mode: Mod installation and updates disabled.")
-            for cb in self.mods.values():
-                cb.setEnabled(False)
-                cb.setToolTip("Requires internet connection.")
-            self.install_mods_only_btn.setEnabled(False)
+            self.status_bar.showMessage("Warning: Patches missing. Downgrade will be disabled.")
 
     def init_ui(self):
         central_widget = QWidget()
@@ -1119,12 +1014,13 @@ class DowngraderApp(QMainWindow):
         mod_group.setLayout(mod_grid)
         main_layout.addWidget(mod_group)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["File", "Patch", "Status", "Current MD5", "Target MD5"])
+        self.table_model = ResultsTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.setStyleSheet("font-size: 10px;")
         self.table.verticalHeader().setDefaultSectionSize(20)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         main_layout.addWidget(self.table)
 
         footer_layout = QHBoxLayout()
@@ -1143,12 +1039,16 @@ class DowngraderApp(QMainWindow):
             QPushButton:disabled { background-color: #555555; color: #aaaaaa; }
         """)
         self.downgrade_btn.clicked.connect(self.start_downgrade)
+        self.delta_backups_cb = QCheckBox("Compact Backups")
+        self.delta_backups_cb.setToolTip("Store backups as reverse deltas against the downgraded files. "
+                                         "Uses far less disk space, but revert needs the downgraded files unchanged.")
 
         footer_layout.addWidget(self.exit_btn)
         footer_layout.addStretch()
         footer_layout.addWidget(self.info_btn)
         footer_layout.addWidget(self.tools_btn)
         footer_layout.addWidget(self.revert_btn)
+        footer_layout.addWidget(self.delta_backups_cb)
         footer_layout.addWidget(self.downgrade_btn)
         main_layout.addLayout(footer_layout)
 
@@ -1161,6 +1061,16 @@ class DowngraderApp(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Ready")
 
+    def apply_connectivity(self, online):
+        enabled = online and self.has_scanned
+        self.install_mods_only_btn.setEnabled(enabled)
+        for cb in self.mods.values():
+            cb.setEnabled(enabled)
+            cb.setToolTip("" if online else "Requires internet connection.")
+
+        if not online:
+            self.status_bar.showMessage("Offline Mode: Mod installation and updates disabled.")
+
     def handle_mod_dependencies(self, _):
         self.mods["ASI Loader"].blockSignals(True)
         self.mods["ModLoader"].blockSignals(True)
@@ -1203,14 +1113,30 @@ class DowngraderApp(QMainWindow):
         dlg = ToolsDialog(self)
         dlg.exec()
 
+    def closeEvent(self, event):
+        self.scan_coordinator.shutdown()
+        patch_thread = getattr(self, "patch_thread", None)
+        if patch_thread is not None and patch_thread.isRunning():
+            self.status_bar.showMessage("Stopping after the files in progress...")
+            patch_thread.cancel.cancel()
+            patch_thread.wait()
+        revert_thread = getattr(self, "revert_thread", None)
+        if revert_thread is not None:
+            revert_thread.wait()
+        startup_thread = getattr(self, "startup_thread", None)
+        if startup_thread is not None and startup_thread.isRunning():
+            startup_thread.requestInterruption()
+            startup_thread.wait(NETWORK_THREAD_WAIT_MS)
+        self.connectivity.shutdown()
+        super().closeEvent(event)
+
     def revert_downgrade(self):
         path = self.path_edit.text()
         if not path:
             QMessageBox.warning(self, "Warning", "Please select game path first.")
             return
 
-        backup_dir = os.path.join(path, "backups")
-        if not os.path.exists(backup_dir):
+        if not backups.has_backups(path):
             QMessageBox.warning(self, "No Backups", "No backups found to revert.")
             return
 
@@ -1219,22 +1145,28 @@ class DowngraderApp(QMainWindow):
             QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            import shutil
-            self.status_bar.showMessage("Reverting files...")
-            try:
-                for root, dirs, files in os.walk(backup_dir):
-                    for file in files:
-                        backup_file = os.path.join(root, file)
-                        rel_path = os.path.relpath(backup_file, backup_dir)
-                        target_file = os.path.join(path, rel_path)
-                        
-                        os.makedirs(os.path.dirname(target_file), exist_ok=True)
-                        shutil.copy2(backup_file, target_file)
-                
-                QMessageBox.information(self, "Success", "Revert complete!")
-                self.scan_directory(path)
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to revert: {str(e)}")
+            self.status_bar.showMessage("Checking which files changed...")
+            self.revert_btn.setEnabled(False)
+            self.downgrade_btn.setEnabled(False)
+            self.browse_btn.setEnabled(False)
+
+            self.revert_thread = RevertThread(path, self.hash_cache, self.scan_engine.results)
+            self.revert_thread.progress.connect(lambda cur, tot: self.status_bar.showMessage(f"Reverting: {cur}/{tot}"))
+            self.revert_thread.finished.connect(self.handle_revert_finished)
+            self.revert_thread.error.connect(self.handle_revert_error)
+            self.revert_thread.start()
+
+    def handle_revert_finished(self, restored):
+        self.revert_btn.setEnabled(True)
+        self.browse_btn.setEnabled(True)
+        QMessageBox.information(self, "Success", f"Revert complete! {restored} files restored.")
+        self.scan_directory(self.path_edit.text())
+
+    def handle_revert_error(self, message):
+        self.revert_btn.setEnabled(True)
+        self.browse_btn.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Failed to revert: {message}")
+        self.scan_directory(self.path_edit.text())
 
     def browse_path(self):
         dir_path = QFileDialog.getExistingDirectory(self, "Select GTA SA Directory")
@@ -1242,30 +1174,19 @@ class DowngraderApp(QMainWindow):
             self.path_edit.setText(dir_path)
             self.scan_directory(dir_path)
 
-    def scan_directory(self, path):
+    def scan_directory(self, path, force=False):
         if not hasattr(self, 'resolved_manifest_path'):
-            self.resolved_manifest_path = "Patches/manifest.json"
-            if not os.path.exists(self.resolved_manifest_path):
-                self.resolved_manifest_path = get_resource_path("Patches/manifest.json")
+            self.resolved_manifest_path = paths.resolve_manifest_path()
 
         if not os.path.exists(self.resolved_manifest_path):
             QMessageBox.warning(self, "Warning", "Patches missing. Please run Tools -> Download Patches or restart the app.")
             return
 
         self.status_bar.showMessage("Scanning files...")
-        self.scanner = ScannerThread(path, self.resolved_manifest_path)
-        self.scanner.progress.connect(lambda cur, tot: self.status_bar.showMessage(f"Scanning: {cur}/{tot}"))
-        self.scanner.finished.connect(self.update_table)
-        self.scanner.start()
-
-        if linux_tools.is_linux():
-            apps = linux_tools.get_steam_apps()
-            if apps:
-                self.detected_appid = apps[0]["appid"]
-                self.status_bar.showMessage(f"Linux detected. Steam AppID: {self.detected_appid}")
+        self.scan_coordinator.request(path, self.resolved_manifest_path, force)
 
     def update_table(self, results, detected_version, is_readonly):
-        self.table.setRowCount(0)
+        self.table_model.set_results(results)
         different_count = 0
         self.is_v10_us = "v1.0 US" in detected_version
         
@@ -1280,25 +1201,9 @@ class DowngraderApp(QMainWindow):
             self.downgrade_btn.setEnabled(True)
             self.downgrade_btn.setToolTip("")
 
-        installed_mods = []
-        game_path = self.path_edit.text()
-        config_path = os.path.join(game_path, "modloader", ".downgrader")
-        if os.path.exists(config_path):
-            try:
-                with open(config_path, 'r') as f:
-                    data = json.load(f)
-                    installed_mods = data.get("installed_mods", [])
-            except Exception:
-                pass
-
-        for row, data in enumerate(results):
-            self.table.insertRow(row)
-            self.table.setItem(row, 0, QTableWidgetItem(data["path"]))
-            self.table.setItem(row, 1, QTableWidgetItem(data["needs_patch"]))
-            self.table.setItem(row, 2, QTableWidgetItem(data["status"]))
-            self.table.setItem(row, 3, QTableWidgetItem(data["current_hash"]))
-            self.table.setItem(row, 4, QTableWidgetItem(data["target_hash"]))
-            
+        installed_mods = mods.get_installed_mods(self.path_edit.text())
+
+        for data in results:
             if data["needs_patch"] == "Yes":
                 different_count += 1
         
@@ -1309,11 +1214,10 @@ class DowngraderApp(QMainWindow):
             self.status_bar.showMessage("Scan complete. Game is already v1.0 US.")
 
         self.revert_btn.setEnabled(True)
-        self.install_mods_only_btn.setEnabled(updater.has_internet())
+        self.has_scanned = True
+        self.apply_connectivity(self.connectivity.is_online())
 
         for name, cb in self.mods.items():
-            cb.setEnabled(updater.has_internet())
-            cb.setToolTip("" if updater.has_internet() else "Requires internet connection.")
             if name in installed_mods:
                 cb.setChecked(True)
 
@@ -1327,48 +1231,54 @@ class DowngraderApp(QMainWindow):
             QMessageBox.critical(self, "Error", "Manifest not found.")
             return
 
+        if self.scan_coordinator.is_scanning():
+            QMessageBox.information(self, "Scanning", "Please wait for the current scan to finish.")
+            return
+
         try:
-            with open(self.resolved_manifest_path, 'r') as f:
-                manifest = json.load(f)
+            manifest = scanner.load_manifest(self.resolved_manifest_path)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load manifest: {str(e)}")
             return
 
         patches_dir = os.path.dirname(self.resolved_manifest_path)
-        self.status_bar.showMessage("Starting downgrade...")
-        
-        import platform
-        if platform.system() == "Windows":
-            xdelta_bin = get_resource_path(os.path.join("bin", "xdelta3.exe"))
-        else:
-            xdelta_bin = get_resource_path(os.path.join("bin", "xdelta3_linux"))
+        plan = planner.plan_downgrade(path, manifest, patches_dir, self.scan_engine.results)
+        summary = (f"Files to patch: {plan['to_patch']}\n"
+                   f"Read: {format_size(plan['read_bytes'])}, write: {format_size(plan['write_bytes'])}\n"
+                   f"New backups: {format_size(plan['backup_bytes'])}\n"
+                   f"Peak temporary space: {format_size(plan['peak_temp_bytes'])}\n"
+                   f"Disk space needed: {format_size(plan['required_bytes'])} "
+                   f"(free: {format_size(plan['free_bytes'])})\n"
+                   f"Estimated time: {format_duration(plan['estimated_seconds'])}")
+        if plan["missing_patches"]:
+            summary += f"\n\nMissing patches: {len(plan['missing_patches'])} files will fail."
+
+        if not plan["fits"]:
+            QMessageBox.critical(self, "Not Enough Disk Space", f"The downgrade would fill the disk.\n\n{summary}")
+            return
 
-        if not os.path.exists(xdelta_bin):
-            xdelta_bin = "xdelta3"
-            
-        try:
-            import subprocess
-            creationflags = 0
-            if platform.system() == "Windows":
-                creationflags = subprocess.CREATE_NO_WINDOW
-            subprocess.run([xdelta_bin, "-V"], capture_output=True, creationflags=creationflags)
-        except FileNotFoundError:
-            QMessageBox.critical(self, "Error", f"xdelta3 binary not found at {xdelta_bin} or in PATH.")
+        reply = QMessageBox.question(self, "Confirm Downgrade", f"{summary}\n\nStart the downgrade?",
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply != QMessageBox.Yes:
             return
 
+        self.status_bar.showMessage("Starting downgrade...")
+        
+        xdelta_bin = paths.find_xdelta_bin()
+
         self.downgrade_btn.setEnabled(False)
         self.browse_btn.setEnabled(False)
         
-        self.patch_thread = PatchThread(path, manifest, xdelta_bin, patches_dir)
+        self.patch_thread = PatchThread(path, manifest, xdelta_bin, patches_dir, self.hash_cache, self.scan_engine.results,
+                                        plan, self.delta_backups_cb.isChecked())
         self.patch_thread.file_progress.connect(self.update_file_status)
         self.patch_thread.finished.connect(self.handle_patch_finished)
         self.patch_thread.start()
 
-    def update_file_status(self, row, status, message):
-        self.table.setItem(row, 2, QTableWidgetItem(status))
-        if message:
-            self.table.setItem(row, 2, QTableWidgetItem(f"{status} ({message})"))
-        self.table.scrollToItem(self.table.item(row, 0))
+    def update_file_status(self, updates):
+        changed = self.table_model.set_statuses(updates)
+        if changed:
+            self.table.scrollTo(self.table_model.index(changed[-1], 0))
 
     def handle_patch_finished(self, success_count, fail_count):
         self.downgrade_btn.setEnabled(True)
@@ -1400,7 +1310,7 @@ class DowngraderApp(QMainWindow):
         self.install_selected_mods(path, selected)
 
     def install_selected_mods(self, game_path, selected_mods):
-        if not updater.has_internet():
+        if not self.connectivity.is_online():
             QMessageBox.critical(self, "Error", "Internet connection required to install mods.")
             return
 
@@ -1421,12 +1331,13 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
     
-    icon_path = get_resource_path(os.path.join("assets", "icon.ico"))
+    icon_path = paths.get_resource_path(os.path.join("assets", "icon.ico"))
     if os.path.exists(icon_path):
         app.setWindowIcon(QIcon(icon_path))
 
     window = DowngraderApp()
-
-    window.check_patches_and_start()
+    window.show()
+    window.mark_startup("window_shown")
+    window.start_bootstrap()
 
     sys.exit(app.exec())
\ No newline at end of file
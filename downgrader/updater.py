@@ -4,23 +4,45 @@ import platform
 import requests
 import subprocess
 import time
+import threading
+from core import net
 
 CURRENT_VERSION = "v0.1.1"
 REPO_URL = "https://api.github.com/repos/xxanqw/gtasa-open-downgrader/releases/latest"
+CONNECTIVITY_TTL = 30
 
-def has_internet():
+_connectivity_lock = threading.Lock()
+_last_connectivity = (0.0, None)
+
+def probe_internet():
     try:
-        requests.get("https://1.1.1.1", timeout=3)
+        # A probe that retries would hold up startup when offline.
+        net.get("https://1.1.1.1", timeout=3, retry=False)
         return True
     except (requests.ConnectionError, requests.Timeout):
         return False
 
+def has_internet(max_age=CONNECTIVITY_TTL):
+    global _last_connectivity
+    with _connectivity_lock:
+        checked_at, online = _last_connectivity
+        if online is not None and time.monotonic() - checked_at < max_age:
+            return online
+
+    online = probe_internet()
+    with _connectivity_lock:
+        _last_connectivity = (time.monotonic(), online)
+    return online
+
 def check_for_updates():
     if not has_internet():
         return None, None
+    return fetch_update()
 
+def fetch_update():
     try:
-        response = requests.get(REPO_URL, timeout=5)
+        # Not retried: the check is optional and the window waits for it on close.
+        response = net.get(REPO_URL, timeout=5, retry=False)
         response.raise_for_status()
         data = response.json()
         latest_version = data.get("tag_name")
@@ -32,6 +54,31 @@ def check_for_updates():
     
     return None, None
 
+def find_update_download_url(assets):
+    system = platform.system()
+    for asset in assets:
+        if system == "Windows" and asset["name"].endswith(".exe"):
+            if is_offline():
+                if "installer" in asset["name"].lower():
+                    return asset["browser_download_url"]
+            else:
+                if "installer" not in asset["name"].lower():
+                    return asset["browser_download_url"]
+        elif system == "Linux" and asset["name"].lower().endswith(".appimage"):
+            if is_offline():
+                if "offline" in asset["name"].lower():
+                    return asset["browser_download_url"]
+            else:
+                if "offline" not in asset["name"].lower():
+                    return asset["browser_download_url"]
+
+    for asset in assets:
+        if system == "Windows" and asset["name"].endswith(".exe"):
+            return asset["browser_download_url"]
+        elif system == "Linux" and asset["name"].lower().endswith(".appimage"):
+            return asset["browser_download_url"]
+    return None
+
 def run_update_script(download_url):
     system = platform.system()
     temp_dir = os.path.dirname(os.path.abspath(sys.executable if getattr(sys, 'frozen', False) else __file__))
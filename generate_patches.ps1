@@ -73,6 +73,8 @@ foreach ($exeName in @("gta-sa.exe", "gta_sa.exe")) {
                 source_hash = $hashSteam
                 target_hash = $hashV10
                 action = "copy"
+                source_size = (Get-Item $steamExePath).Length
+                target_size = (Get-Item $v10ExePath).Length
             })
             $FoundExe = $true
         }
@@ -86,6 +88,8 @@ if (-not $FoundExe -and (Test-Path (Join-Path $V10Dir "gta_sa.exe"))) {
         source_hash = "MISSING"
         target_hash = $hashV10
         action = "copy"
+        source_size = $null
+        target_size = (Get-Item (Join-Path $V10Dir "gta_sa.exe")).Length
     })
 }
 
@@ -109,6 +113,8 @@ foreach ($relPath in $CommonFiles) {
             source_hash = $hashSteam
             target_hash = $hashV10
             action = "patch"
+            source_size = (Get-Item (Join-Path $SteamDir $relPath)).Length
+            target_size = (Get-Item (Join-Path $V10Dir $relPath)).Length
         })
     } else {
         $IdenticalCount++
@@ -210,6 +216,8 @@ foreach ($item in $ManifestData) {
             action = $action
             source_hash = $item.source_hash
             target_hash = $item.target_hash
+            source_size = $item.source_size
+            target_size = $item.target_size
         })
     }
 }
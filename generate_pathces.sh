@@ -69,7 +69,9 @@ for exe_name in "gta-sa.exe" "gta_sa.exe"; do
         md5_steam=$(md5sum "$STEAM_DIR/$exe_name" | awk '{print $1}')
         md5_v10=$(md5sum "$V10_DIR/gta_sa.exe" | awk '{print $1}')
         if [ "$md5_steam" != "$md5_v10" ]; then
-            echo "$exe_name|$md5_steam|$md5_v10|copy" >> "$TEMP_DIR/manifest_data.txt"
+            size_steam=$(stat -c%s "$STEAM_DIR/$exe_name")
+            size_v10=$(stat -c%s "$V10_DIR/gta_sa.exe")
+            echo "$exe_name|$md5_steam|$md5_v10|copy|$size_steam|$size_v10" >> "$TEMP_DIR/manifest_data.txt"
             FOUND_EXE=true
         fi
     fi
@@ -77,7 +79,8 @@ done
 
 if [ "$FOUND_EXE" = false ] && [ -f "$V10_DIR/gta_sa.exe" ]; then
     md5_v10=$(md5sum "$V10_DIR/gta_sa.exe" | awk '{print $1}')
-    echo "gta_sa.exe|MISSING|$md5_v10|copy" >> "$TEMP_DIR/manifest_data.txt"
+    size_v10=$(stat -c%s "$V10_DIR/gta_sa.exe")
+    echo "gta_sa.exe|MISSING|$md5_v10|copy|null|$size_v10" >> "$TEMP_DIR/manifest_data.txt"
 fi
 
 DIFFERENT=$(wc -l < "$TEMP_DIR/manifest_data.txt" || echo 0)
@@ -96,7 +99,9 @@ while IFS= read -r rel_path; do
     md5_v10=$(md5sum "$V10_DIR/$rel_path" 2>/dev/null | awk '{print $1}')
 
     if [ "$md5_steam" != "$md5_v10" ]; then
-        echo "$rel_path|$md5_steam|$md5_v10|patch" >> "$TEMP_DIR/manifest_data.txt"
+        size_steam=$(stat -c%s "$STEAM_DIR/$rel_path")
+        size_v10=$(stat -c%s "$V10_DIR/$rel_path")
+        echo "$rel_path|$md5_steam|$md5_v10|patch|$size_steam|$size_v10" >> "$TEMP_DIR/manifest_data.txt"
         DIFFERENT=$((DIFFERENT + 1))
     else
         IDENTICAL=$((IDENTICAL + 1))
@@ -122,7 +127,7 @@ FAILED=0
 TOTAL_SIZE_ORIGINAL=0
 TOTAL_SIZE_PATCHES=0
 
-while IFS='|' read -r rel_path steam_hash v10_hash action; do
+while IFS='|' read -r rel_path steam_hash v10_hash action steam_size v10_size; do
     PATCH_NUM=$((PATCH_NUM + 1))
 
     src_file="$STEAM_DIR/$rel_path"
@@ -181,7 +186,7 @@ cat > "$PATCHES_DIR/manifest.json" << EOF
 EOF
 
 first=true
-while IFS='|' read -r rel_path steam_hash v10_hash action; do
+while IFS='|' read -r rel_path steam_hash v10_hash action steam_size v10_size; do
     VALID=false
     if [ "$action" == "copy" ] && [ -f "$PATCHES_DIR/gta_sa.exe" ]; then VALID=true; fi
     if [ "$action" == "patch" ] && [ -f "$PATCHES_DIR/$rel_path.xdelta" ]; then VALID=true; fi
@@ -197,7 +202,9 @@ while IFS='|' read -r rel_path steam_hash v10_hash action; do
       "path": "$rel_path",
       "action": "$action",
       "source_hash": "$steam_hash",
-      "target_hash": "$v10_hash"
+      "target_hash": "$v10_hash",
+      "source_size": $steam_size,
+      "target_size": $v10_size
     }
 EOF
     fi
@@ -0,0 +1,49 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "downgrader"))
+
+from core import journal
+
+MANIFEST = {"generated": "test"}
+
+def tear_tail(game_path):
+    with open(os.path.join(game_path, journal.JOURNAL_NAME), 'a') as f:
+        f.write('{"path": "torn", "sta')
+
+def test_resume_twice_with_torn_tail(tmp_path):
+    game_path = str(tmp_path)
+
+    first = journal.PatchJournal(game_path, MANIFEST)
+    first.record("a.img", journal.COMMITTED, hash="1")
+    first.close(complete=False)
+    tear_tail(game_path)
+
+    second = journal.PatchJournal(game_path, MANIFEST)
+    assert second.was_interrupted()
+    assert second.state("a.img") == journal.COMMITTED
+    second.record("b.img", journal.BACKED_UP, hash="2")
+    second.close(complete=False)
+    tear_tail(game_path)
+
+    third = journal.PatchJournal(game_path, MANIFEST)
+    assert third.state("a.img") == journal.COMMITTED
+    assert third.state("b.img") == journal.BACKED_UP
+    assert third.state("torn") is None
+    third.close()
+    assert not os.path.exists(os.path.join(game_path, journal.JOURNAL_NAME))
+
+def test_other_manifest_starts_over(tmp_path):
+    game_path = str(tmp_path)
+
+    first = journal.PatchJournal(game_path, MANIFEST)
+    first.record("a.img", journal.COMMITTED, hash="1")
+    first.close(complete=False)
+
+    second = journal.PatchJournal(game_path, {"generated": "other"})
+    assert not second.was_interrupted()
+    second.close(complete=False)
+
+    third = journal.PatchJournal(game_path, MANIFEST)
+    assert not third.was_interrupted()
+    third.close()